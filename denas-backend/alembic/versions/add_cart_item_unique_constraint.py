@@ -0,0 +1,44 @@
+"""add unique (cart_id, product_id) constraint to shopping cart items
+
+Revision ID: add_cart_item_unique_constraint
+Revises: add_product_search_indexes
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_cart_item_unique_constraint'
+down_revision = 'add_product_search_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Merge existing duplicates into the oldest row before adding the constraint
+    op.execute("""
+        UPDATE shopping_cart_items AS sci
+        SET quantity = dup.total_quantity
+        FROM (
+            SELECT MIN(id) AS keep_id, SUM(quantity) AS total_quantity
+            FROM shopping_cart_items
+            GROUP BY cart_id, product_id
+            HAVING COUNT(*) > 1
+        ) AS dup
+        WHERE sci.id = dup.keep_id
+    """)
+    op.execute("""
+        DELETE FROM shopping_cart_items AS sci
+        USING shopping_cart_items AS keep
+        WHERE sci.cart_id = keep.cart_id
+          AND sci.product_id = keep.product_id
+          AND sci.id > keep.id
+    """)
+    op.create_unique_constraint(
+        'unique_cart_product_item',
+        'shopping_cart_items',
+        ['cart_id', 'product_id']
+    )
+
+def downgrade():
+    op.drop_constraint('unique_cart_product_item', 'shopping_cart_items', type_='unique')
@@ -0,0 +1,27 @@
+"""add covering index for product catalog
+
+Revision ID: add_catalog_covering_index
+Revises: fix_availability_enum
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_catalog_covering_index'
+down_revision = 'fix_availability_enum'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Catalog filters (active flag, category, price range), covering the catalog columns
+    op.create_index(
+        'ix_products_active_category_covering',
+        'products',
+        ['is_active', 'category_id', 'price'],
+        postgresql_include=['id', 'name', 'availability_type']
+    )
+
+def downgrade():
+    op.drop_index('ix_products_active_category_covering', table_name='products')
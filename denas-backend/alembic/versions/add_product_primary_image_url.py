@@ -0,0 +1,33 @@
+"""add denormalized primary_image_url to products
+
+Revision ID: add_product_primary_image_url
+Revises: add_cart_item_unique_constraint
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_product_primary_image_url'
+down_revision = 'add_cart_item_unique_constraint'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('products', sa.Column('primary_image_url', sa.String(length=255), nullable=True))
+
+    # Backfill with the first official image, otherwise the first image of each product
+    op.execute("""
+        UPDATE products AS p
+        SET primary_image_url = (
+            SELECT pi.image_url
+            FROM product_images AS pi
+            WHERE pi.product_id = p.id
+            ORDER BY pi.image_type <> 'OFFICIAL', pi.id
+            LIMIT 1
+        )
+    """)
+
+def downgrade():
+    op.drop_column('products', 'primary_image_url')
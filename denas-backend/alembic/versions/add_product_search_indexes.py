@@ -0,0 +1,37 @@
+"""add product trigram search indexes
+
+Revision ID: add_product_search_indexes
+Revises: add_catalog_covering_index
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_product_search_indexes'
+down_revision = 'add_catalog_covering_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Trigram GIN indexes make ILIKE '%term%' on name/description index-seekable
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        'ix_products_name_trgm',
+        'products',
+        ['name'],
+        postgresql_using='gin',
+        postgresql_ops={'name': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'ix_products_description_trgm',
+        'products',
+        ['description'],
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'}
+    )
+
+def downgrade():
+    op.drop_index('ix_products_description_trgm', table_name='products')
+    op.drop_index('ix_products_name_trgm', table_name='products')
@@ -0,0 +1,44 @@
+"""add full-text search column to products
+
+Revision ID: add_product_search_tsv
+Revises: add_product_primary_image_url
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_product_search_tsv'
+down_revision = 'add_product_primary_image_url'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Generated tsvector over name + description, maintained by Postgres itself
+    op.execute("""
+        ALTER TABLE products ADD COLUMN search_tsv tsvector
+        GENERATED ALWAYS AS (
+            to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))
+        ) STORED
+    """)
+    op.create_index(
+        'ix_products_search_tsv',
+        'products',
+        ['search_tsv'],
+        postgresql_using='gin'
+    )
+
+    # Description search now goes through search_tsv; only name keeps substring matching
+    op.drop_index('ix_products_description_trgm', table_name='products')
+
+def downgrade():
+    op.create_index(
+        'ix_products_description_trgm',
+        'products',
+        ['description'],
+        postgresql_using='gin',
+        postgresql_ops={'description': 'gin_trgm_ops'}
+    )
+    op.drop_index('ix_products_search_tsv', table_name='products')
+    op.drop_column('products', 'search_tsv')
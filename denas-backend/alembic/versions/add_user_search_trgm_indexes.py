@@ -0,0 +1,42 @@
+"""add trigram search indexes on users phone and uid
+
+Revision ID: add_user_search_trgm_indexes
+Revises: add_product_search_tsv
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_user_search_trgm_indexes'
+down_revision = 'add_product_search_tsv'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Built concurrently so sign-ins are not blocked; that cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_phone_trgm',
+            'users',
+            ['phone'],
+            postgresql_using='gin',
+            postgresql_ops={'phone': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+        op.create_index(
+            'ix_users_uid_trgm',
+            'users',
+            ['uid'],
+            postgresql_using='gin',
+            postgresql_ops={'uid': 'gin_trgm_ops'},
+            postgresql_concurrently=True
+        )
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_uid_trgm', table_name='users', postgresql_concurrently=True)
+        op.drop_index('ix_users_phone_trgm', table_name='users', postgresql_concurrently=True)
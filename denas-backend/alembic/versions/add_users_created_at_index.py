@@ -0,0 +1,22 @@
+"""add created_at index on users
+
+Revision ID: add_users_created_at_index
+Revises: add_user_search_trgm_indexes
+Create Date: 2026-10-16 15:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_users_created_at_index'
+down_revision = 'add_user_search_trgm_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Range scans for "new users this month" in the admin stats
+    op.create_index('ix_users_created_at', 'users', ['created_at'])
+
+def downgrade():
+    op.drop_index('ix_users_created_at', table_name='users')
@@ -0,0 +1,27 @@
+"""add text_pattern_ops index for phone prefix search
+
+Revision ID: add_users_phone_pattern_index
+Revises: add_users_role_indexes
+Create Date: 2026-10-16 15:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_users_phone_pattern_index'
+down_revision = 'add_users_role_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # LIKE 'prefix%' can only use a btree under the C collation or with text_pattern_ops
+    op.create_index(
+        'ix_users_phone_pattern',
+        'users',
+        ['phone'],
+        postgresql_ops={'phone': 'text_pattern_ops'}
+    )
+
+def downgrade():
+    op.drop_index('ix_users_phone_pattern', table_name='users')
@@ -0,0 +1,31 @@
+"""add role indexes on users
+
+Revision ID: add_users_role_indexes
+Revises: add_users_created_at_index
+Create Date: 2026-10-16 15:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'add_users_role_indexes'
+down_revision = 'add_users_created_at_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Role filter in the admin user listing and per-role counts
+    op.create_index('ix_users_role', 'users', ['role'])
+
+    # Staff accounts are a handful of rows; a partial index keeps them one small lookup away
+    op.create_index(
+        'ix_users_staff',
+        'users',
+        ['id'],
+        postgresql_where=sa.text("role IN ('ADMIN', 'MANAGER')")
+    )
+
+def downgrade():
+    op.drop_index('ix_users_staff', table_name='users')
+    op.drop_index('ix_users_role', table_name='users')
@@ -0,0 +1,35 @@
+"""cover the current catalog select in the catalog index
+
+Revision ID: rebuild_catalog_covering_index
+Revises: add_users_phone_pattern_index
+Create Date: 2026-10-16 15:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'rebuild_catalog_covering_index'
+down_revision = 'add_users_phone_pattern_index'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # The catalog now also selects primary_image_url and orders by created_at; include
+    # both so pages filtered by active/category/price can be answered from the index
+    op.drop_index('ix_products_active_category_covering', table_name='products')
+    op.create_index(
+        'ix_products_active_category_covering',
+        'products',
+        ['is_active', 'category_id', 'price'],
+        postgresql_include=['id', 'name', 'availability_type', 'primary_image_url', 'created_at']
+    )
+
+def downgrade():
+    op.drop_index('ix_products_active_category_covering', table_name='products')
+    op.create_index(
+        'ix_products_active_category_covering',
+        'products',
+        ['is_active', 'category_id', 'price'],
+        postgresql_include=['id', 'name', 'availability_type']
+    )
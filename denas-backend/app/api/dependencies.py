@@ -7,7 +7,7 @@ from app.services.firebase import get_current_user_uid, get_current_user_uid_opt
 from app.services.user_auth import UserService
 from app.models.user import User, UserRole
 
-async def get_current_user(
+def get_current_user(
     firebase_uid: str = Depends(get_current_user_uid),
     db: Session = Depends(get_db)
 ) -> User:
@@ -15,7 +15,7 @@ async def get_current_user(
     Get current authenticated user from database
     Raises 404 if user not found (user needs to be registered first)
     """
-    user = await UserService.get_user_by_uid(db, firebase_uid)
+    user = UserService.get_user_by_uid(db, firebase_uid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -23,7 +23,7 @@ async def get_current_user(
         )
     return user
 
-async def get_current_user_optional(
+def get_current_user_optional(
     firebase_uid: Optional[str] = Depends(get_current_user_uid_optional),
     db: Session = Depends(get_db)
 ) -> Optional[User]:
@@ -34,7 +34,7 @@ async def get_current_user_optional(
     if not firebase_uid:
         return None
     
-    user = await UserService.get_user_by_uid(db, firebase_uid)
+    user = UserService.get_user_by_uid(db, firebase_uid)
     return user
 
 async def require_admin_access(
@@ -96,7 +96,7 @@ async def get_current_user_from_cookie(
         firebase_uid = await firebase_service.verify_token_direct(id_token)
         
         # Get user from database
-        user = await UserService.get_user_by_uid(db, firebase_uid)
+        user = UserService.get_user_by_uid(db, firebase_uid)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -20,7 +20,7 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=User)
-async def register_user(
+def register_user(
     request: UserRegistrationRequest,
     firebase_uid: str = Depends(get_current_user_uid),
     db: Session = Depends(get_db)
@@ -30,7 +30,7 @@ async def register_user(
     The Firebase token provides the UID, phone comes from request body
     """
     try:
-        user = await UserService.create_user(
+        user = UserService.create_user(
             db=db,
             uid=firebase_uid,
             phone=request.phone
@@ -42,7 +42,7 @@ async def register_user(
     except Exception as e:
         if "already exists" in str(e).lower() or "unique" in str(e).lower():
             # User already exists, return existing user
-            existing_user = await UserService.get_user_by_uid(db, firebase_uid)
+            existing_user = UserService.get_user_by_uid(db, firebase_uid)
             if existing_user:
                 logger.info(f"User already registered: {existing_user.id} with UID: {firebase_uid}")
                 return existing_user
@@ -65,7 +65,7 @@ async def get_current_user_profile(
 
 
 @router.get("/me/or-create", response_model=User)
-async def get_or_create_user(
+def get_or_create_user(
     firebase_uid: str = Depends(get_current_user_uid),
     db: Session = Depends(get_db)
 ):
@@ -75,7 +75,7 @@ async def get_or_create_user(
     """
     try:
         # Try to get user first
-        user = await UserService.get_user_by_uid(db, firebase_uid)
+        user = UserService.get_user_by_uid(db, firebase_uid)
         if user:
             logger.info(f"Existing user found: {user.id} with UID: {firebase_uid}")
             return user
@@ -99,7 +99,7 @@ async def get_or_create_user(
 
 # Admin endpoints
 @router.get("/admin/users", response_model=UserListResponse)
-async def get_all_users(
+def get_all_users(
     page: int = Query(1, ge=1),
     limit: int = Query(50, ge=1, le=100),
     role_filter: Optional[UserRole] = Query(None),
@@ -111,7 +111,7 @@ async def get_all_users(
     """
     try:
         offset = (page - 1) * limit
-        users, total_count = await UserService.get_all_users(
+        users, total_count = UserService.get_all_users(
             db=db,
             limit=limit,
             offset=offset,
@@ -136,7 +136,7 @@ async def get_all_users(
 
 
 @router.get("/admin/stats", response_model=UserStatsResponse)
-async def get_user_statistics(
+def get_user_statistics(
     db: Session = Depends(get_db),
     admin_user: User = Depends(require_admin_access)
 ):
@@ -144,7 +144,7 @@ async def get_user_statistics(
     Get user statistics (Admin only)
     """
     try:
-        stats = await UserService.get_user_stats(db)
+        stats = UserService.get_user_stats(db)
         return UserStatsResponse(**stats)
         
     except Exception as e:
@@ -156,7 +156,7 @@ async def get_user_statistics(
 
 
 @router.put("/admin/users/{user_id}/role", response_model=User)
-async def update_user_role(
+def update_user_role(
     user_id: int,
     new_role: UserRole,
     db: Session = Depends(get_db),
@@ -166,7 +166,7 @@ async def update_user_role(
     Update user role (Admin only)
     """
     try:
-        updated_user = await UserService.update_user_role(
+        updated_user = UserService.update_user_role(
             db=db,
             user_id=user_id,
             new_role=new_role
@@ -189,7 +189,7 @@ async def update_user_role(
 
 
 @router.delete("/admin/users/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
     admin_user: User = Depends(require_admin_access)
@@ -198,7 +198,7 @@ async def delete_user(
     Delete user (Admin only)
     """
     try:
-        deleted_user = await UserService.delete_user(db=db, user_id=user_id)
+        deleted_user = UserService.delete_user(db=db, user_id=user_id)
         
         logger.info(f"User deleted by admin {admin_user.id}: user {user_id}")
         return {
@@ -221,7 +221,7 @@ async def delete_user(
 
 
 @router.get("/admin/users/search", response_model=List[User])
-async def search_users(
+def search_users(
     q: str = Query(..., min_length=1),
     limit: int = Query(20, ge=1, le=50),
     db: Session = Depends(get_db),
@@ -231,7 +231,7 @@ async def search_users(
     Search users by phone number or other criteria (Admin only)
     """
     try:
-        users = await UserService.search_users(
+        users = UserService.search_users(
             db=db,
             search_term=q,
             limit=limit
@@ -449,7 +449,7 @@ async def check_session(
             firebase_uid = await firebase_service.verify_token_direct(id_token)
             
             # Get user from database
-            user = await UserService.get_user_by_uid(db, firebase_uid)
+            user = UserService.get_user_by_uid(db, firebase_uid)
             
             if user:
                 return SessionResponse(
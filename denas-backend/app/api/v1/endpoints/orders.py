@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, case
 from typing import List, Optional
 import logging
 from decimal import Decimal
@@ -273,23 +274,22 @@ async def get_order_stats(
     Get order statistics (admin only)
     """
     try:
-        total_orders = db.query(OrderModel).count()
-        pending_orders = db.query(OrderModel).filter(OrderModel.status == OrderStatus.PENDING).count()
-        completed_orders = db.query(OrderModel).filter(OrderModel.status == OrderStatus.COMPLETED).count()
-        cancelled_orders = db.query(OrderModel).filter(OrderModel.status == OrderStatus.CANCELLED).count()
-        
-        # Calculate total revenue from completed orders
-        total_revenue_result = db.query(OrderModel.total_price).filter(
-            OrderModel.status == OrderStatus.COMPLETED
-        ).all()
-        total_revenue = sum(order.total_price for order in total_revenue_result) if total_revenue_result else 0
+        # All counters and the revenue in a single aggregate round trip
+        stats = db.query(
+            func.count(OrderModel.id).label("total_orders"),
+            func.sum(case((OrderModel.status == OrderStatus.PENDING, 1), else_=0)).label("pending_orders"),
+            func.sum(case((OrderModel.status == OrderStatus.COMPLETED, 1), else_=0)).label("completed_orders"),
+            func.sum(case((OrderModel.status == OrderStatus.CANCELLED, 1), else_=0)).label("cancelled_orders"),
+            # Total revenue from completed orders
+            func.sum(case((OrderModel.status == OrderStatus.COMPLETED, OrderModel.total_price), else_=0)).label("total_revenue")
+        ).one()
         
         return {
-            "total_orders": total_orders,
-            "pending_orders": pending_orders,
-            "completed_orders": completed_orders,
-            "cancelled_orders": cancelled_orders,
-            "total_revenue": float(total_revenue)
+            "total_orders": stats.total_orders,
+            "pending_orders": int(stats.pending_orders or 0),
+            "completed_orders": int(stats.completed_orders or 0),
+            "cancelled_orders": int(stats.cancelled_orders or 0),
+            "total_revenue": float(stats.total_revenue or 0)
         }
         
     except Exception as e:
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, case
 from typing import List, Optional
 import logging
 
@@ -257,30 +258,24 @@ async def get_payment_stats(
     Get payment statistics (admin only)
     """
     try:
-        total_payments = db.query(PaymentModel).count()
-        pending_payments = db.query(PaymentModel).filter(PaymentModel.status == PaymentStatus.PENDING).count()
-        completed_payments = db.query(PaymentModel).filter(PaymentModel.status == PaymentStatus.COMPLETED).count()
-        failed_payments = db.query(PaymentModel).filter(PaymentModel.status == PaymentStatus.FAILED).count()
-        
-        # Calculate total processed amount (completed payments)
-        completed_amount_result = db.query(PaymentModel.amount).filter(
-            PaymentModel.status == PaymentStatus.COMPLETED
-        ).all()
-        total_processed = sum(payment.amount for payment in completed_amount_result) if completed_amount_result else 0
-        
-        # Calculate pending amount
-        pending_amount_result = db.query(PaymentModel.amount).filter(
-            PaymentModel.status == PaymentStatus.PENDING
-        ).all()
-        total_pending = sum(payment.amount for payment in pending_amount_result) if pending_amount_result else 0
+        # All counters and amounts in a single aggregate round trip
+        stats = db.query(
+            func.count(PaymentModel.id).label("total_payments"),
+            func.sum(case((PaymentModel.status == PaymentStatus.PENDING, 1), else_=0)).label("pending_payments"),
+            func.sum(case((PaymentModel.status == PaymentStatus.COMPLETED, 1), else_=0)).label("completed_payments"),
+            func.sum(case((PaymentModel.status == PaymentStatus.FAILED, 1), else_=0)).label("failed_payments"),
+            # Total processed (completed) and pending amounts
+            func.sum(case((PaymentModel.status == PaymentStatus.COMPLETED, PaymentModel.amount), else_=0)).label("total_processed"),
+            func.sum(case((PaymentModel.status == PaymentStatus.PENDING, PaymentModel.amount), else_=0)).label("total_pending")
+        ).one()
         
         return {
-            "total_payments": total_payments,
-            "pending_payments": pending_payments,
-            "completed_payments": completed_payments,
-            "failed_payments": failed_payments,
-            "total_processed_amount": float(total_processed),
-            "total_pending_amount": float(total_pending)
+            "total_payments": stats.total_payments,
+            "pending_payments": int(stats.pending_payments or 0),
+            "completed_payments": int(stats.completed_payments or 0),
+            "failed_payments": int(stats.failed_payments or 0),
+            "total_processed_amount": float(stats.total_processed or 0),
+            "total_pending_amount": float(stats.total_pending or 0)
         }
         
     except Exception as e:
@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from decimal import Decimal
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_db, get_async_db
 from app.services.products_service import ProductService
 from app.schemas.product import (
     Product, ProductCreate, ProductUpdate, ProductCatalog, 
@@ -21,6 +22,7 @@ router = APIRouter()
 # Public endpoints for product catalog
 @router.get("/catalog", response_model=ProductListResponse)
 async def get_products_catalog(
+    background_tasks: BackgroundTasks,
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(20, ge=1, le=100, description="Page size"),
     category_id: Optional[int] = Query(None, description="Filter by category ID"),
@@ -32,7 +34,7 @@ async def get_products_catalog(
     sort_by: str = Query("created_at", description="Sort by: name, price, created_at"),
     sort_order: str = Query("desc", description="Sort order: asc, desc"),
     current_user: Optional[User] = Depends(get_current_user_optional),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get products catalog with filtering, searching, and pagination (public endpoint)
@@ -55,6 +57,21 @@ async def get_products_catalog(
             current_user=current_user
         )
         
+        # Clients page through the catalog sequentially: warm the cache for the next page
+        if skip + size < total:
+            background_tasks.add_task(
+                ProductService.prefetch_catalog_page,
+                skip=skip + size,
+                limit=size,
+                category_id=category_id,
+                min_price=min_price,
+                max_price=max_price,
+                availability_type=availability_type,
+                search=search,
+                sort_by=sort_by,
+                sort_order=sort_order
+            )
+        
         return ProductListResponse(
             items=products,
             total=total,
@@ -81,28 +98,7 @@ async def get_featured_products(
     Get featured products - latest active products that are in stock (public endpoint)
     """
     try:
-        products = await ProductService.get_featured_products(db=db, limit=limit)
-        
-        # Convert to catalog format
-        catalog_products = []
-        for product in products:
-            primary_image = next(
-                (img for img in product.images if img.image_type.value == "official"),
-                product.images[0] if product.images else None
-            )
-            
-            catalog_product = ProductCatalog(
-                id=product.id,
-                name=product.name,
-                price=product.price,
-                image_url=primary_image.image_url if primary_image else None,
-                availability_type=product.availability_type,
-                is_active=product.is_active,
-                category_id=product.category_id
-            )
-            catalog_products.append(catalog_product)
-        
-        return catalog_products
+        return await ProductService.get_featured_products(db=db, limit=limit)
         
     except Exception as e:
         logger.error(f"Error fetching featured products: {str(e)}")
@@ -235,6 +231,11 @@ async def create_product(
         logger.info(f"Product created successfully: {product.name} by admin {admin_user.id}")
         return product
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error creating product: {str(e)}")
         raise HTTPException(
@@ -271,6 +272,11 @@ async def update_product(
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         logger.error(f"Error updating product {product_id}: {str(e)}")
         raise HTTPException(
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
-from app.db.database import get_db
-from app.services.shopping_cart_service import ShoppingCartService
+from app.db.database import get_db, get_async_db
+from app.services.shopping_cart_service import ShoppingCartService, ShoppingCartReadService
 from app.schemas.shopping_cart import (
     ShoppingCartResponse, 
     ShoppingCartSummary,
@@ -26,17 +27,18 @@ router = APIRouter()
 @router.get("/", response_model=ShoppingCartResponse)
 async def get_my_cart(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    async_db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get current user's shopping cart with all items and product details
     """
     try:
-        service = ShoppingCartService(db)
-        cart = service.get_cart_with_items(current_user.id)
+        cart = await ShoppingCartReadService(async_db).get_cart_with_items(current_user.id)
         
         if not cart:
             # Create an empty cart for the user
+            service = ShoppingCartService(db)
             cart = service.get_or_create_user_cart(current_user.id)
             # Commit the cart creation and refresh to get the created_at timestamp
             service.db.commit()
@@ -197,14 +199,14 @@ async def clear_cart(
 @router.get("/summary", response_model=ShoppingCartSummary)
 async def get_cart_summary(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Get cart summary with total items and total price
     """
     try:
-        service = ShoppingCartService(db)
-        result = service.get_cart_summary(current_user.id)
+        service = ShoppingCartReadService(db)
+        result = await service.get_cart_summary(current_user.id)
         return ShoppingCartSummary(**result)
         
     except Exception as e:
@@ -252,11 +252,13 @@ async def cleanup_orphaned_images(
 async def force_delete_image_from_storage(
     image_url: str,
     admin_user: User = Depends(require_admin_access),
-    storage: SupabaseStorageService = Depends(get_supabase_storage)
+    storage: SupabaseStorageService = Depends(get_supabase_storage),
+    db: Session = Depends(get_db)
 ):
     """
     Force delete a specific image from Supabase storage (admin only)
-    Use with caution - this bypasses database checks
+    Refuses (409) while a product image still references the object: uploads are
+    content addressed, so one object can back images of several products
     
     Args:
         image_url: Full URL of the image to delete
@@ -268,7 +270,18 @@ async def force_delete_image_from_storage(
     """
     try:
         file_path = storage.extract_file_path_from_url(image_url)
-        success = storage.delete_file(file_path)
+        
+        # Match both the URL as given and the canonical public URL of the object
+        referenced = db.query(ProductImage.id).filter(
+            ProductImage.image_url.in_({image_url, storage.get_file_url(file_path)})
+        ).first()
+        if referenced:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Image is still used by a product and cannot be deleted"
+            )
+        
+        success = await storage.delete_file(file_path)
         
         if success:
             logger.info(f"Force deleted image from storage: {image_url} by admin {admin_user.id}")
@@ -286,6 +299,8 @@ async def force_delete_image_from_storage(
                 "file_path": file_path
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Force delete error: {str(e)}")
         raise HTTPException(
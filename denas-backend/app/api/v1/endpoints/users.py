@@ -73,6 +73,7 @@ async def update_my_profile(
         
         db.commit()
         db.refresh(current_user)
+        UserService.forget_cached_user(current_user.uid)
         return current_user
         
     except HTTPException:
@@ -87,20 +88,22 @@ async def update_my_profile(
 
 # Admin endpoints
 @router.get("/", response_model=List[User])
-async def get_all_users(
+def get_all_users(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=200),
     role_filter: Optional[UserRole] = Query(None),
+    after_id: Optional[int] = Query(None, ge=0, description="Return users after this id (keyset paging; skip is ignored)"),
     admin_user: UserModel = Depends(require_admin_access),
     db: Session = Depends(get_db)
 ):
     """Get all users with filtering (admin only)"""
     try:
-        users, _ = await UserService.get_all_users(
+        users, _ = UserService.get_all_users(
             db=db,
             limit=limit,
             offset=skip,
-            role_filter=role_filter
+            role_filter=role_filter,
+            after_id=after_id
         )
         return users
         
@@ -112,7 +115,7 @@ async def get_all_users(
 
 
 @router.get("/{user_id}", response_model=UserWithDetails)
-async def get_user_by_id(
+def get_user_by_id(
     user_id: int,
     admin_user: UserModel = Depends(require_admin_access),
     db: Session = Depends(get_db)
@@ -143,7 +146,7 @@ async def get_user_by_id(
 
 
 @router.put("/{user_id}", response_model=User)
-async def update_user(
+def update_user(
     user_id: int,
     user_update: UserUpdate,
     admin_user: UserModel = Depends(require_admin_access),
@@ -151,7 +154,7 @@ async def update_user(
 ):
     """Update user (admin only)"""
     try:
-        user = await UserService.get_user_by_id(db, user_id)
+        user = UserService.get_user_by_id(db, user_id)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -160,7 +163,7 @@ async def update_user(
         
         # Check if phone is already taken (if being updated)
         if user_update.phone and user_update.phone != user.phone:
-            existing_user = await UserService.get_user_by_phone(db, user_update.phone)
+            existing_user = UserService.get_user_by_phone(db, user_update.phone)
             if existing_user and existing_user.id != user_id:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -168,12 +171,14 @@ async def update_user(
                 )
         
         # Update fields
+        previous_uid = user.uid
         update_data = user_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             if hasattr(user, field):
                 setattr(user, field, value)
         
         db.commit()
+        UserService.forget_cached_user(previous_uid)
         db.refresh(user)
         return user
         
@@ -188,14 +193,14 @@ async def update_user(
 
 
 @router.delete("/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     admin_user: UserModel = Depends(require_admin_access),
     db: Session = Depends(get_db)
 ):
     """Delete user (admin only)"""
     try:
-        await UserService.delete_user(db, user_id)
+        UserService.delete_user(db, user_id)
         return {"success": True, "message": "User deleted successfully"}
         
     except ValueError as e:
@@ -211,7 +216,7 @@ async def delete_user(
 
 
 @router.get("/search/{search_term}", response_model=List[User])
-async def search_users(
+def search_users(
     search_term: str,
     limit: int = Query(50, ge=1, le=100),
     admin_user: UserModel = Depends(require_admin_access),
@@ -219,7 +224,7 @@ async def search_users(
 ):
     """Search users by phone or UID (admin only)"""
     try:
-        users = await UserService.search_users(
+        users = UserService.search_users(
             db=db,
             search_term=search_term,
             limit=limit
@@ -40,11 +40,28 @@ class Settings(BaseSettings):
     # You can also directly use DATABASE_URL if provided
     DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
     
+    # Connection pool (size it to workers x concurrency and the DB's max_connections;
+    # behind PgBouncer in transaction mode a smaller in-app pool is enough)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Pre-ping costs a round trip on every checkout (each authenticated request);
+    # stale connections are retired by DB_POOL_RECYCLE instead. Enable it if the
+    # network or a proxy drops idle connections sooner than that.
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"
+    # Separate, smaller pool for the async (asyncpg) engine that serves the catalog and
+    # cart reads; both pools count against the DB's max_connections per worker
+    DB_ASYNC_POOL_SIZE: int = int(os.getenv("DB_ASYNC_POOL_SIZE", "10"))
+    DB_ASYNC_MAX_OVERFLOW: int = int(os.getenv("DB_ASYNC_MAX_OVERFLOW", "5"))
+    
     # Supabase Storage Configuration
     SUPABASE_URL: Optional[str] = os.getenv("SUPABASE_URL")
     SUPABASE_KEY: Optional[str] = os.getenv("SUPABASE_KEY")
     SUPABASE_SERVICE_ROLE_KEY: Optional[str] = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
     SUPABASE_STORAGE_BUCKET: str = os.getenv("SUPABASE_STORAGE_BUCKET", "product-images")
+    # Largest accepted upload request body (10 files x 5MB or 5 images x 10MB, plus multipart overhead)
+    MAX_UPLOAD_REQUEST_MB: int = int(os.getenv("MAX_UPLOAD_REQUEST_MB", "55"))
     
     # Firebase Configuration
     FIREBASE_API_KEY: Optional[str] = os.getenv("FIREBASE_API_KEY")
@@ -62,6 +79,17 @@ class Settings(BaseSettings):
             return self.DATABASE_URL
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @property
+    def async_database_url(self) -> str:
+        # Same database, but through the asyncpg driver (used by the async engine)
+        url = self.database_url
+        for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+            if url.startswith(prefix):
+                url = "postgresql+asyncpg://" + url[len(prefix):]
+                break
+        # asyncpg takes ssl=... instead of libpq's sslmode=...
+        return url.replace("sslmode=", "ssl=")
+    
     @property
     def is_production(self) -> bool:
         return self.ENVIRONMENT.lower() == "production"
@@ -1,4 +1,4 @@
 # Re-export for backward compatibility
-from .session import get_db
+from .session import get_db, get_async_db
 
-__all__ = ["get_db"] 
\ No newline at end of file
+__all__ = ["get_db", "get_async_db"] 
\ No newline at end of file
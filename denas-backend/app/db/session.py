@@ -1,8 +1,20 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, future=True)
+# query_cache_size is raised from the default (500) so the compiled forms of
+# all catalog filter combinations and hot lookups stay cached
+engine = create_engine(
+    settings.DATABASE_URL,
+    future=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    query_cache_size=1200
+)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
 def get_db():
@@ -11,3 +23,20 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Async engine (asyncpg) for the hot read paths that run directly on the event loop
+# (catalog, cart); writes still go through the sync session above
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    query_cache_size=1200
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
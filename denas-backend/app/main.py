@@ -1,9 +1,11 @@
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.core.config import settings
 from app.api.v1.api import api_router
+from app.services.supabase_storage import get_supabase_storage
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -12,6 +14,20 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
+# Reject oversized uploads from the Content-Length header, before the multipart
+# body is received and parsed into UploadFiles. Registered before CORS so the
+# CORS middleware (added later, so outermost) also wraps the 413 response.
+@app.middleware("http")
+async def limit_upload_size(request: Request, call_next):
+    if request.url.path.startswith(f"{settings.API_V1_STR}/uploads"):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > settings.MAX_UPLOAD_REQUEST_MB * 1024 * 1024:
+            return JSONResponse(
+                status_code=413,
+                content={"detail": f"Request too large. Maximum size is {settings.MAX_UPLOAD_REQUEST_MB}MB"}
+            )
+    return await call_next(request)
+
 # Set up CORS
 # Configure allowed origins based on environment
 if settings.is_production:
@@ -41,6 +57,12 @@ app.add_middleware(
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+@app.on_event("shutdown")
+async def close_storage_client():
+    # Only close the storage service if it was ever created
+    if get_supabase_storage.cache_info().currsize:
+        await get_supabase_storage().close()
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to Denas Backend API"}
@@ -1,6 +1,7 @@
 # models.py - SQLAlchemy Database Models
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, TIMESTAMP, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, TIMESTAMP, ForeignKey, Enum, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
@@ -26,6 +27,14 @@ class Product(Base):
     is_active = Column(Boolean, default=True)
     category_id = Column(Integer, ForeignKey("categories.id"), nullable=False, index=True)
     created_at = Column(TIMESTAMP, default=func.now())
+    # Denormalized URL of the primary (first official) image, kept in sync by the
+    # product service so the catalog doesn't need to join product_images
+    primary_image_url = Column(String(255), nullable=True)
+    # Full-text search document generated by Postgres; deferred since it's only used in filters
+    search_tsv = deferred(Column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(name, '') || ' ' || coalesce(description, ''))", persisted=True)
+    ))
     
     # Relationships
     category = relationship("Category", back_populates="products")
@@ -33,3 +42,21 @@ class Product(Base):
     order_items = relationship("OrderItem", back_populates="product")
     cart_items = relationship("ShoppingCartItem", back_populates="product")
     favorites = relationship("Favorite", back_populates="product", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Catalog filters (active flag, category, price range), including every column the
+        # catalog selects or sorts by so filter-only pages can be index-only scans
+        Index(
+            'ix_products_active_category_covering',
+            'is_active', 'category_id', 'price',
+            postgresql_include=['id', 'name', 'availability_type', 'primary_image_url', 'created_at']
+        ),
+        # Full-text search over name + description
+        Index('ix_products_search_tsv', 'search_tsv', postgresql_using='gin'),
+        # Trigram index so ILIKE '%term%' on the name can use an index (requires pg_trgm)
+        Index(
+            'ix_products_name_trgm', 'name',
+            postgresql_using='gin',
+            postgresql_ops={'name': 'gin_trgm_ops'}
+        ),
+    )
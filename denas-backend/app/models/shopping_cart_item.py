@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy import Column, Integer, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.base import Base
 
@@ -13,3 +13,8 @@ class ShoppingCartItem(Base):
     # Relationships
     cart = relationship("ShoppingCart", back_populates="cart_items")
     product = relationship("Product", back_populates="cart_items")
+    
+    # One row per product in a cart, quantities are incremented in place
+    __table_args__ = (
+        UniqueConstraint('cart_id', 'product_id', name='unique_cart_product_item'),
+    )
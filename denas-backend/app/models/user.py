@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, TIMESTAMP, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DECIMAL, Boolean, TIMESTAMP, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 import enum
 from app.db.base import Base
 
@@ -15,10 +15,34 @@ class User(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     uid = Column(String(100), unique=True, nullable=False, index=True)
     phone = Column(String(20), unique=True, nullable=False, index=True)
-    role = Column(Enum(UserRole), default=UserRole.USER, nullable=False)
-    created_at = Column(TIMESTAMP, default=func.now())
+    role = Column(Enum(UserRole), default=UserRole.USER, nullable=False, index=True)
+    created_at = Column(TIMESTAMP, default=func.now(), index=True)
     
     # Relationships
     orders = relationship("Order", back_populates="user")
     shopping_cart = relationship("ShoppingCart", back_populates="user", uselist=False)
-    favorites = relationship("Favorite", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
+    favorites = relationship("Favorite", back_populates="user", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Small partial index over staff accounts (admin stats, role-filtered listings)
+        Index(
+            'ix_users_staff', 'id',
+            postgresql_where=text("role IN ('ADMIN', 'MANAGER')")
+        ),
+        # Phone-prefix search (LIKE 'term%') as a btree range scan, independent of collation
+        Index(
+            'ix_users_phone_pattern', 'phone',
+            postgresql_ops={'phone': 'text_pattern_ops'}
+        ),
+        # Trigram indexes so search_users' ILIKE '%term%' can use an index (requires pg_trgm)
+        Index(
+            'ix_users_phone_trgm', 'phone',
+            postgresql_using='gin',
+            postgresql_ops={'phone': 'gin_trgm_ops'}
+        ),
+        Index(
+            'ix_users_uid_trgm', 'uid',
+            postgresql_using='gin',
+            postgresql_ops={'uid': 'gin_trgm_ops'}
+        ),
+    )
@@ -3,6 +3,7 @@ from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func, and_, desc, asc
 from typing import Optional, List, Tuple
 from decimal import Decimal
+from cachetools import TTLCache
 import logging
 
 from app.models.category import Category
@@ -10,6 +11,10 @@ from app.schemas.category import CategoryCreate, CategoryUpdate
 
 logger = logging.getLogger(__name__)
 
+# Categories change rarely: remember ids known to exist so product create/update
+# don't need a round trip just to validate the category (only hits are cached)
+_category_exists_cache = TTLCache(maxsize=1024, ttl=60)
+
 
 class CategoryService:
     """Service for handling category operations"""
@@ -33,19 +38,26 @@ class CategoryService:
         try:
             from app.models.product import Product
             
-            categories = db.query(Category).offset(skip).limit(limit).all()
-            categories_with_metadata = []
+            # Count products for all categories in one grouped scan instead of one COUNT per category
+            product_counts = db.query(
+                Product.category_id,
+                func.count(Product.id).label('product_count')
+            ).group_by(Product.category_id).subquery()
             
-            for category in categories:
-                # Count products in this category
-                product_count = db.query(Product).filter(Product.category_id == category.id).count()
-                can_delete = product_count == 0
-                
+            rows = db.query(
+                Category,
+                func.coalesce(product_counts.c.product_count, 0)
+            ).outerjoin(
+                product_counts, product_counts.c.category_id == Category.id
+            ).offset(skip).limit(limit).all()
+            
+            categories_with_metadata = []
+            for category, product_count in rows:
                 category_dict = {
                     "id": category.id,
                     "name": category.name,
                     "created_at": category.created_at,
-                    "can_delete": can_delete,
+                    "can_delete": product_count == 0,
                     "product_count": product_count
                 }
                 categories_with_metadata.append(category_dict)
@@ -61,6 +73,17 @@ class CategoryService:
         """Get category by ID"""
         return db.query(Category).filter(Category.id == category_id).first()
     
+    @staticmethod
+    async def category_exists(db: Session, category_id: int) -> bool:
+        """Check that a category exists (cached briefly)"""
+        if _category_exists_cache.get(category_id):
+            return True
+        
+        exists = db.query(Category.id).filter(Category.id == category_id).scalar() is not None
+        if exists:
+            _category_exists_cache[category_id] = True
+        return exists
+    
     @staticmethod
     async def get_category_by_name(db: Session, name: str) -> Optional[Category]:
         """Get category by name"""
@@ -121,7 +144,7 @@ class CategoryService:
                 logger.error("Auto-increment sequence may be out of sync. Consider running: SELECT setval('categories_id_seq', (SELECT COALESCE(MAX(id), 0) + 1 FROM categories));")
                 raise ValueError("Database sequence error. Please contact administrator.")
             else:
-            raise ValueError("Category with this name already exists")
+                raise ValueError("Category with this name already exists")
         except Exception as e:
             db.rollback()
             logger.error(f"Error creating category: {str(e)}")
@@ -217,6 +240,7 @@ class CategoryService:
             
             db.delete(category)
             db.commit()
+            _category_exists_cache.pop(category_id, None)
             
             logger.info(f"Category deleted successfully: {category.name}")
             return True
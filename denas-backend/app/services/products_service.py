@@ -1,26 +1,153 @@
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, and_, desc, asc, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql
+from sqlalchemy import func, and_, desc, asc, or_, select, insert, update, bindparam, String
 from typing import Optional, List, Tuple
 from decimal import Decimal
+from cachetools import TTLCache
 import logging
 
+from app.db.session import AsyncSessionLocal
 from app.models.product import Product, AvailabilityType
 from app.models.product_image import ProductImage, ImageType
 from app.models.category import Category
+from app.models.favorite import Favorite
 from app.schemas.product import ProductCreate, ProductUpdate, ProductCatalog
 from app.schemas.product_image import ProductImageCreate
+from app.services.category_service import CategoryService
 from app.services.supabase_storage import get_supabase_storage
 
 logger = logging.getLogger(__name__)
 
+# products.availability_type is the Postgres enum "availabilitytype" (see the
+# fix_availability_enum migration). asyncpg sends String binds as $n::VARCHAR,
+# which doesn't compare against an enum, so filter binds carry the enum type.
+_AVAILABILITY_ENUM = postgresql.ENUM(
+    'IN_STOCK', 'PRE_ORDER', 'DISCONTINUED',
+    name='availabilitytype',
+    create_type=False
+)
+
+# Fixed-shape statements for hot lookups, built once at import time so each
+# call only binds parameters and hits the engine's compiled-statement cache
+_GET_BY_ID_STMT = select(Product).where(Product.id == bindparam("product_id"))
+
+_GET_WITH_DETAILS_STMT = select(Product).options(
+    joinedload(Product.category),
+    joinedload(Product.images)
+).where(Product.id == bindparam("product_id"))
+
+# Columns rendered by ProductCatalog; catalog and featured queries both select
+# exactly these, so their rows always have the same shape
+_CATALOG_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.price,
+    Product.availability_type,
+    Product.is_active,
+    Product.category_id,
+    Product.primary_image_url
+)
+
+_FEATURED_STMT = select(*_CATALOG_COLUMNS).where(
+    Product.is_active == True,
+    Product.availability_type == AvailabilityType.IN_STOCK.value
+).order_by(desc(Product.created_at)).limit(bindparam("limit"))
+
+# Catalog pages keyed by their filter/sort/pagination arguments. Cleared whenever
+# a product is created, updated or deleted; the TTL bounds staleness across workers.
+_catalog_cache: TTLCache = TTLCache(maxsize=512, ttl=30)
+
+# Next-page prefetches currently running (by cache key), capped so a burst of
+# catalog requests can't turn into a burst of extra background queries
+_prefetch_in_flight: set = set()
+_MAX_CONCURRENT_PREFETCHES = 4
+
+
+def _catalog_cache_key(
+    skip: int,
+    limit: int,
+    category_id: Optional[int],
+    min_price: Optional[Decimal],
+    max_price: Optional[Decimal],
+    availability_type: Optional[AvailabilityType],
+    search: Optional[str],
+    sort_by: str,
+    sort_order: str
+) -> tuple:
+    """Cache key of a catalog page"""
+    return (
+        skip, limit, category_id, min_price, max_price,
+        availability_type, search, sort_by, sort_order.lower()
+    )
+
+
+def _catalog_item(row) -> ProductCatalog:
+    """Convert a _CATALOG_COLUMNS row (already in the right shape, skip validation)"""
+    return ProductCatalog.model_construct(
+        id=row.id,
+        name=row.name,
+        price=row.price,
+        image_url=row.primary_image_url,
+        availability_type=row.availability_type,
+        is_active=row.is_active,
+        category_id=row.category_id,
+        is_favorited=None
+    )
+
+
+def _catalog_filters(
+    category_id: Optional[int],
+    min_price: Optional[Decimal],
+    max_price: Optional[Decimal],
+    availability_type: Optional[AvailabilityType],
+    search: Optional[str]
+) -> list:
+    """
+    Build catalog filter criteria.
+    Every value is sent as a bound parameter, so the compiled SQL only depends on
+    which filters are present and is reused from the engine's statement cache.
+    """
+    criteria = []
+    
+    if category_id:
+        criteria.append(Product.category_id == bindparam("category_id", category_id))
+    
+    if min_price is not None:
+        criteria.append(Product.price >= bindparam("min_price", min_price))
+    
+    if max_price is not None:
+        criteria.append(Product.price <= bindparam("max_price", max_price))
+    
+    if availability_type is not None:
+        availability_value = getattr(availability_type, "value", availability_type)
+        criteria.append(
+            Product.availability_type
+            == bindparam("availability_type", availability_value, type_=_AVAILABILITY_ENUM)
+        )
+    
+    if search:
+        # Whole words in name/description through the full-text index, plus
+        # partial-word matches on the name through the trigram index
+        criteria.append(
+            or_(
+                Product.search_tsv.op("@@")(
+                    func.plainto_tsquery("simple", bindparam("search_query", search, type_=String))
+                ),
+                Product.name.ilike(bindparam("search_pattern", f"%{search}%", type_=String))
+            )
+        )
+    
+    return criteria
+
 
 class ProductService:
     """Service for handling product operations"""
     
     @staticmethod
     async def get_products_catalog(
-        db: Session,
+        db: AsyncSession,
         skip: int = 0,
         limit: int = 50,
         category_id: Optional[int] = None,
@@ -36,35 +163,105 @@ class ProductService:
         """
         Get products for catalog with filtering, searching, and pagination
         Catalog always returns only active products
+        Pages are cached for a short time; favorites are applied per user on top
         Returns: (products, total_count)
         """
-        query = db.query(Product).options(
-            joinedload(Product.images)
+        cache_key = _catalog_cache_key(
+            skip, limit, category_id, min_price, max_price,
+            availability_type, search, sort_by, sort_order
         )
+        page = _catalog_cache.get(cache_key)
+        if page is None:
+            page = await ProductService._query_catalog_page(
+                db, skip, limit, category_id, min_price, max_price,
+                availability_type, search, sort_by, sort_order
+            )
+            _catalog_cache[cache_key] = page
         
-        # Always filter for active products only in catalog
-        query = query.filter(Product.is_active == True)
-        
-        # Apply filters
-        if category_id:
-            query = query.filter(Product.category_id == category_id)
+        catalog_products, total = page
         
-        if min_price is not None:
-            query = query.filter(Product.price >= min_price)
-            
-        if max_price is not None:
-            query = query.filter(Product.price <= max_price)
-            
-        if availability_type is not None:
-            query = query.filter(Product.availability_type == availability_type)
-            
-        if search:
-            query = query.filter(
-                or_(
-                    Product.name.ilike(f"%{search}%"),
-                    Product.description.ilike(f"%{search}%")
+        # Mark user favorites for these products if user is authenticated
+        if current_user:
+            product_ids = [product.id for product in catalog_products]
+            favorites = await db.scalars(
+                select(Favorite.product_id).where(
+                    Favorite.user_id == current_user.id,
+                    Favorite.product_id.in_(product_ids)
                 )
             )
+            user_favorites = set(favorites.all())
+            
+            # Copy so the cached (user independent) page is never modified
+            catalog_products = [
+                product.model_copy(update={"is_favorited": product.id in user_favorites})
+                for product in catalog_products
+            ]
+        
+        return catalog_products, total
+    
+    @staticmethod
+    async def prefetch_catalog_page(
+        skip: int,
+        limit: int,
+        category_id: Optional[int] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        availability_type: Optional[AvailabilityType] = None,
+        search: Optional[str] = None,
+        sort_by: str = "created_at",
+        sort_order: str = "desc"
+    ) -> None:
+        """
+        Load a catalog page into the cache ahead of the request for it (run as a background task)
+        Skipped if the page is cached or already being fetched, or too many prefetches are running
+        """
+        cache_key = _catalog_cache_key(
+            skip, limit, category_id, min_price, max_price,
+            availability_type, search, sort_by, sort_order
+        )
+        if cache_key in _catalog_cache or cache_key in _prefetch_in_flight:
+            return
+        if len(_prefetch_in_flight) >= _MAX_CONCURRENT_PREFETCHES:
+            return
+        
+        _prefetch_in_flight.add(cache_key)
+        try:
+            # Own session: the request's session is closed by the time background tasks run
+            async with AsyncSessionLocal() as db:
+                _catalog_cache[cache_key] = await ProductService._query_catalog_page(
+                    db, skip, limit, category_id, min_price, max_price,
+                    availability_type, search, sort_by, sort_order
+                )
+        except Exception as e:
+            logger.warning(f"Failed to prefetch catalog page (skip={skip}, limit={limit}): {str(e)}")
+        finally:
+            _prefetch_in_flight.discard(cache_key)
+    
+    @staticmethod
+    async def _query_catalog_page(
+        db: AsyncSession,
+        skip: int,
+        limit: int,
+        category_id: Optional[int],
+        min_price: Optional[Decimal],
+        max_price: Optional[Decimal],
+        availability_type: Optional[AvailabilityType],
+        search: Optional[str],
+        sort_by: str,
+        sort_order: str
+    ) -> Tuple[List[ProductCatalog], int]:
+        """Run the catalog queries for one page, without any user specific data"""
+        # Only fetch the columns the catalog actually renders
+        query = select(*_CATALOG_COLUMNS)
+        
+        # Always filter for active products only in catalog
+        query = query.where(
+            Product.is_active == True,
+            *_catalog_filters(category_id, min_price, max_price, availability_type, search)
+        )
+        
+        # Get total count
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
         
         # Apply sorting
         if sort_order.lower() == "desc":
@@ -79,50 +276,15 @@ class ProductService:
         else:  # default to created_at
             query = query.order_by(sort_func(Product.created_at))
         
-        # Get total count
-        total = query.count()
-        
         # Apply pagination
-        products = query.offset(skip).limit(limit).all()
-        
-        # Get user favorites for these products if user is authenticated
-        user_favorites = set()
-        if current_user:
-            from app.models.favorite import Favorite
-            product_ids = [product.id for product in products]
-            favorites = db.query(Favorite).filter(
-                Favorite.user_id == current_user.id,
-                Favorite.product_id.in_(product_ids)
-            ).all()
-            user_favorites = {fav.product_id for fav in favorites}
-        
-        # Convert to catalog format
-        catalog_products = []
-        for product in products:
-            # Get primary image
-            primary_image = next(
-                (img for img in product.images if img.image_type == ImageType.OFFICIAL),
-                product.images[0] if product.images else None
-            )
-            
-            catalog_product = ProductCatalog(
-                id=product.id,
-                name=product.name,
-                price=product.price,
-                image_url=primary_image.image_url if primary_image else None,
-                availability_type=product.availability_type,
-                is_active=product.is_active,
-                category_id=product.category_id,
-                is_favorited=product.id in user_favorites if current_user else None
-            )
-            catalog_products.append(catalog_product)
+        rows = (await db.execute(query.offset(skip).limit(limit))).all()
         
-        return catalog_products, total
+        return [_catalog_item(row) for row in rows], total
     
     @staticmethod
     async def get_product_by_id(db: Session, product_id: int) -> Optional[Product]:
         """Get product by ID"""
-        return db.query(Product).filter(Product.id == product_id).first()
+        return db.execute(_GET_BY_ID_STMT, {"product_id": product_id}).scalar_one_or_none()
     
     @staticmethod
     async def get_product_with_details(
@@ -130,10 +292,54 @@ class ProductService:
         product_id: int
     ) -> Optional[Product]:
         """Get product with all related data (category, images)"""
-        return db.query(Product).options(
-            joinedload(Product.category),
-            joinedload(Product.images)
-        ).filter(Product.id == product_id).first()
+        return db.execute(
+            _GET_WITH_DETAILS_STMT, {"product_id": product_id}
+        ).unique().scalar_one_or_none()
+    
+    @staticmethod
+    def _unshared_image_urls(db: Session, image_urls: List[str], product_id: int) -> List[str]:
+        """
+        Filter out image URLs other products still use
+        Uploads are content addressed, so identical images share one storage object
+        """
+        if not image_urls:
+            return []
+        
+        shared = {
+            row.image_url for row in
+            db.query(ProductImage.image_url).filter(
+                ProductImage.image_url.in_(image_urls),
+                ProductImage.product_id != product_id
+            ).distinct().all()
+        }
+        return [url for url in image_urls if url not in shared]
+    
+    @staticmethod
+    def _primary_image_url(image_urls: Optional[List[str]]) -> Optional[str]:
+        """Primary image of a new image list (all images are created as official, so it is the first one)"""
+        return image_urls[0] if image_urls else None
+    
+    @staticmethod
+    def _create_product_images(
+        db: Session,
+        product_id: int,
+        image_urls: Optional[List[str]]
+    ) -> None:
+        """Insert all images of a product with a single executemany INSERT"""
+        if not image_urls:
+            return
+        
+        db.execute(
+            insert(ProductImage),
+            [
+                {
+                    "product_id": product_id,
+                    "image_url": image_url,
+                    "image_type": ImageType.OFFICIAL
+                }
+                for image_url in image_urls
+            ]
+        )
     
     @staticmethod
     async def create_product(
@@ -143,27 +349,26 @@ class ProductService:
         """
         Create a new product with images
         Returns: created product
+        Raises: ValueError if the category doesn't exist
         """
+        if not await CategoryService.category_exists(db, product_data.category_id):
+            raise ValueError(f"Category {product_data.category_id} not found")
+        
         try:
-            # Create product
+            # Create product; INSERT ... RETURNING gives back the id and defaults, no refresh needed
             product_dict = product_data.dict(exclude={'image_urls'})
-            product = Product(**product_dict)
-            
-            db.add(product)
-            db.flush()  # Flush to get the ID
+            product_dict['primary_image_url'] = ProductService._primary_image_url(product_data.image_urls)
+            product = db.execute(
+                insert(Product).values(**product_dict).returning(Product)
+            ).scalar_one()
             
             # Create product images if provided
-            if product_data.image_urls:
-                for image_url in product_data.image_urls:
-                    product_image = ProductImage(
-                        product_id=product.id,
-                        image_url=image_url,
-                        image_type=ImageType.OFFICIAL
-                    )
-                    db.add(product_image)
+            ProductService._create_product_images(db, product.id, product_data.image_urls)
             
+            # Detach so the commit doesn't expire the returned attributes
+            db.expunge(product)
             db.commit()
-            db.refresh(product)
+            _catalog_cache.clear()
             
             logger.info(f"Product created successfully: {product.name}")
             return product
@@ -186,55 +391,66 @@ class ProductService:
         """
         Update product with proper image cleanup
         Returns: updated product or None if not found
+        Raises: ValueError if the new category doesn't exist
         """
+        if product_data.category_id is not None and not await CategoryService.category_exists(db, product_data.category_id):
+            raise ValueError(f"Category {product_data.category_id} not found")
+        
         try:
-            product = await ProductService.get_product_by_id(db, product_id)
-            if not product:
-                return None
-
-            # Get current images before updating
-            current_images = db.query(ProductImage).filter(ProductImage.product_id == product_id).all()
-            current_image_urls = [img.image_url for img in current_images]
-
             # Update product fields
             update_data = product_data.dict(exclude_unset=True, exclude={'image_urls'})
-            for field, value in update_data.items():
-                setattr(product, field, value)
+            if product_data.image_urls is not None:
+                update_data['primary_image_url'] = ProductService._primary_image_url(product_data.image_urls)
+
+            # UPDATE ... RETURNING writes and reads back the row in one statement
+            if update_data:
+                product = db.execute(
+                    update(Product).where(Product.id == product_id).values(**update_data).returning(Product)
+                ).scalar_one_or_none()
+            else:
+                product = await ProductService.get_product_by_id(db, product_id)
+            if not product:
+                return None
 
             # Update images if provided
+            removed_image_urls = []
             if product_data.image_urls is not None:
                 new_image_urls = product_data.image_urls
                 
-                # Determine which images to delete from storage
-                images_to_delete = [url for url in current_image_urls if url not in new_image_urls]
+                # Get current images before replacing them
+                current_image_urls = [
+                    row.image_url for row in
+                    db.query(ProductImage.image_url).filter(ProductImage.product_id == product_id).all()
+                ]
                 
-                if images_to_delete:
-                    # Clean up old images from Supabase storage
-                    try:
-                        storage = get_supabase_storage()
-                        file_paths_to_delete = storage.extract_file_paths_from_urls(images_to_delete)
-                        delete_result = storage.delete_files(file_paths_to_delete)
-                        logger.info(f"Cleaned up {delete_result['deleted']} old images from storage for product {product_id}")
-                        if delete_result['failed'] > 0:
-                            logger.warning(f"Failed to delete {delete_result['failed']} images from storage")
-                    except Exception as storage_error:
-                        logger.error(f"Failed to clean up old images from storage: {str(storage_error)}")
-                        # Continue with database update even if storage cleanup fails
+                # Candidates for storage cleanup; checked for other references after the commit
+                removed_image_urls = [url for url in current_image_urls if url not in new_image_urls]
 
                 # Delete existing image records
                 db.query(ProductImage).filter(ProductImage.product_id == product_id).delete()
 
                 # Create new image records
-                for image_url in new_image_urls:
-                    product_image = ProductImage(
-                        product_id=product.id,
-                        image_url=image_url,
-                        image_type=ImageType.OFFICIAL
-                    )
-                    db.add(product_image)
+                ProductService._create_product_images(db, product.id, new_image_urls)
 
+            # Detach so the commit doesn't expire the returned attributes
+            db.expunge(product)
             db.commit()
-            db.refresh(product)
+            _catalog_cache.clear()
+
+            # Clean up replaced images only once the new references are committed, and
+            # only those no other product still uses (uploads are content-addressed)
+            if removed_image_urls:
+                try:
+                    images_to_delete = ProductService._unshared_image_urls(db, removed_image_urls, product_id)
+                    if images_to_delete:
+                        storage = get_supabase_storage()
+                        file_paths_to_delete = storage.extract_file_paths_from_urls(images_to_delete)
+                        delete_result = await storage.delete_files(file_paths_to_delete)
+                        logger.info(f"Cleaned up {delete_result['deleted']} old images from storage for product {product_id}")
+                        if delete_result['failed'] > 0:
+                            logger.warning(f"Failed to delete {delete_result['failed']} images from storage")
+                except Exception as storage_error:
+                    logger.error(f"Failed to clean up old images from storage: {str(storage_error)}")
 
             logger.info(f"Product updated successfully: {product.name}")
             return product
@@ -254,32 +470,46 @@ class ProductService:
         Returns: True if deleted, False if not found
         """
         try:
-            product = await ProductService.get_product_by_id(db, product_id)
-            if not product:
+            # Get all image URLs for this product before deletion
+            image_urls = [
+                row.image_url for row in
+                db.query(ProductImage.image_url).filter(ProductImage.product_id == product_id).all()
+            ]
+
+            # Bulk delete dependent rows and the product itself, without loading
+            # the product or cascading through its relationships in the ORM
+            db.query(ProductImage).filter(
+                ProductImage.product_id == product_id
+            ).delete(synchronize_session=False)
+            db.query(Favorite).filter(
+                Favorite.product_id == product_id
+            ).delete(synchronize_session=False)
+            deleted = db.query(Product).filter(
+                Product.id == product_id
+            ).delete(synchronize_session=False)
+
+            if not deleted:
+                db.rollback()
                 return False
 
-            # Get all images for this product before deletion
-            product_images = db.query(ProductImage).filter(ProductImage.product_id == product_id).all()
-            image_urls = [img.image_url for img in product_images]
+            db.commit()
+            _catalog_cache.clear()
 
-            # Clean up images from Supabase storage
+            # Clean up images from Supabase storage once the product is gone
+            image_urls = ProductService._unshared_image_urls(db, image_urls, product_id)
             if image_urls:
                 try:
                     storage = get_supabase_storage()
                     file_paths_to_delete = storage.extract_file_paths_from_urls(image_urls)
-                    delete_result = storage.delete_files(file_paths_to_delete)
+                    delete_result = await storage.delete_files(file_paths_to_delete)
                     logger.info(f"Cleaned up {delete_result['deleted']} images from storage for deleted product {product_id}")
                     if delete_result['failed'] > 0:
                         logger.warning(f"Failed to delete {delete_result['failed']} images from storage during product deletion")
                 except Exception as storage_error:
                     logger.error(f"Failed to clean up images from storage during product deletion: {str(storage_error)}")
-                    # Continue with product deletion even if storage cleanup fails
+                    # Product is already deleted, storage cleanup failures are only logged
 
-            # Delete the product (this will cascade delete images due to foreign key relationship)
-            db.delete(product)
-            db.commit()
-
-            logger.info(f"Product deleted successfully: {product.name}")
+            logger.info(f"Product deleted successfully: {product_id}")
             return True
 
         except Exception as e:
@@ -293,9 +523,7 @@ class ProductService:
     async def get_featured_products(
         db: Session,
         limit: int = 10
-    ) -> List[Product]:
-        """Get featured products (latest or most popular)"""
-        return db.query(Product).filter(
-            Product.is_active == True,
-            Product.availability_type == AvailabilityType.IN_STOCK.value
-        ).order_by(desc(Product.created_at)).limit(limit).all()
+    ) -> List[ProductCatalog]:
+        """Get featured products (latest or most popular) in catalog format"""
+        rows = db.execute(_FEATURED_STMT, {"limit": limit}).all()
+        return [_catalog_item(row) for row in rows]
@@ -1,5 +1,7 @@
 from sqlalchemy.orm import Session, joinedload, selectinload
-from sqlalchemy import func
+from sqlalchemy import func, and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import Optional, Dict, Any
 import logging
 
@@ -15,8 +17,11 @@ class ShoppingCartValidator:
     """Validation logic for shopping cart operations"""
     
     @staticmethod
-    def validate_product_availability(product: ProductModel, requested_quantity: int) -> None:
-        """Validate if product is available and has sufficient stock"""
+    def validate_product_availability(product: Any, requested_quantity: int) -> None:
+        """
+        Validate if product is available and has sufficient stock
+        Accepts a product model or any row exposing is_active and stock_quantity
+        """
         if not product:
             raise ValueError("Product not found")
         
@@ -30,13 +35,10 @@ class ShoppingCartValidator:
             )
     
     @staticmethod
-    def validate_cart_item_ownership(cart_item: ShoppingCartItemModel, user_id: int) -> None:
-        """Validate if user owns the cart item"""
+    def validate_cart_item_found(cart_item: Any) -> None:
+        """Validate that the cart item was found (ownership is enforced by the query itself)"""
         if not cart_item:
-            raise ValueError("Cart item not found")
-        
-        if cart_item.cart.user_id != user_id:
-            raise ValueError("Not authorized to access this cart item")
+            raise ValueError("Cart item not found or not authorized")
 
 
 class ShoppingCartService:
@@ -47,16 +49,28 @@ class ShoppingCartService:
         self.validator = ShoppingCartValidator()
     
     def get_or_create_user_cart(self, user_id: int) -> ShoppingCartModel:
-        """Get existing cart or create new one for user"""
+        """
+        Get existing cart or create new one for user
+        Runs in the caller's transaction, which is responsible for the commit
+        """
         try:
             cart = self.db.query(ShoppingCartModel).filter(
                 ShoppingCartModel.user_id == user_id
             ).first()
             
             if not cart:
-                cart = ShoppingCartModel(user_id=user_id)
-                self.db.add(cart)
-                self.db.flush()  # Get the ID without committing
+                # Insert and read back the new cart in one statement; a concurrent request
+                # may have created it since the SELECT, then nothing is inserted
+                cart = self.db.execute(
+                    pg_insert(ShoppingCartModel).values(user_id=user_id).on_conflict_do_nothing(
+                        index_elements=['user_id']
+                    ).returning(ShoppingCartModel)
+                ).scalar_one_or_none()
+            
+            if not cart:
+                cart = self.db.query(ShoppingCartModel).filter(
+                    ShoppingCartModel.user_id == user_id
+                ).one()
             
             return cart
             
@@ -65,76 +79,63 @@ class ShoppingCartService:
             self.db.rollback()
             raise
     
-    def get_cart_with_items(self, user_id: int) -> Optional[ShoppingCartModel]:
-        """Get user's cart with all items and product details"""
-        try:
-            cart = self.db.query(ShoppingCartModel).options(
-                selectinload(ShoppingCartModel.cart_items).options(
-                    joinedload(ShoppingCartItemModel.product).options(
-                        joinedload(ProductModel.category),
-                        selectinload(ProductModel.images)
-                    )
-                )
-            ).filter(ShoppingCartModel.user_id == user_id).first()
-            
-            return cart
-            
-        except Exception as e:
-            logger.error(f"Error fetching cart for user {user_id}: {str(e)}")
-            raise
-    
     def add_item_to_cart(self, user_id: int, product_id: int, quantity: int) -> Dict[str, Any]:
         """Add item to cart or update quantity if exists"""
         try:
             # Get or create cart
             cart = self.get_or_create_user_cart(user_id)
             
-            # Get product with category and images
-            product = self.db.query(ProductModel).options(
-                joinedload(ProductModel.category),
-                selectinload(ProductModel.images)
+            # Product availability and the existing cart item (if any) in one round trip
+            product = self.db.query(
+                ProductModel.is_active,
+                ProductModel.stock_quantity,
+                ShoppingCartItemModel.id.label("item_id"),
+                ShoppingCartItemModel.quantity.label("item_quantity")
+            ).select_from(ProductModel).outerjoin(
+                ShoppingCartItemModel,
+                and_(
+                    ShoppingCartItemModel.product_id == ProductModel.id,
+                    ShoppingCartItemModel.cart_id == cart.id
+                )
             ).filter(ProductModel.id == product_id).first()
             
-            # Check existing cart item
-            existing_item = self.db.query(ShoppingCartItemModel).filter(
-                ShoppingCartItemModel.cart_id == cart.id,
-                ShoppingCartItemModel.product_id == product_id
-            ).first()
+            existing_quantity = product.item_quantity if product and product.item_id else 0
+            self.validator.validate_product_availability(product, existing_quantity + quantity)
             
-            if existing_item:
-                new_quantity = existing_item.quantity + quantity
-                self.validator.validate_product_availability(product, new_quantity)
-                
-                existing_item.quantity = new_quantity
-                self.db.commit()
-                
+            # Atomic insert-or-increment, concurrent adds can't create duplicate rows
+            stmt = pg_insert(ShoppingCartItemModel).values(
+                cart_id=cart.id,
+                product_id=product_id,
+                quantity=quantity
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['cart_id', 'product_id'],
+                set_={'quantity': ShoppingCartItemModel.__table__.c.quantity + stmt.excluded.quantity}
+            ).returning(ShoppingCartItemModel.id, ShoppingCartItemModel.quantity)
+            
+            cart_item = self.db.execute(stmt).one()
+            
+            # Re-check stock in case a concurrent add raced past the check above
+            self.validator.validate_product_availability(product, cart_item.quantity)
+            
+            self.db.commit()
+            
+            if product.item_id:
                 return {
                     "success": True,
                     "message": "Item quantity updated in cart",
-                    "item_id": existing_item.id,
-                    "new_quantity": new_quantity,
-                    "action": "updated"
-                }
-            else:
-                self.validator.validate_product_availability(product, quantity)
-                
-                cart_item = ShoppingCartItemModel(
-                    cart_id=cart.id,
-                    product_id=product_id,
-                    quantity=quantity
-                )
-                
-                self.db.add(cart_item)
-                self.db.commit()
-                self.db.refresh(cart_item)
-                
-                return {
-                    "success": True,
-                    "message": "Item added to cart",
                     "item_id": cart_item.id,
-                    "quantity": cart_item.quantity,
-                    "action": "added"
+                    "new_quantity": cart_item.quantity,
+                    "action": "updated"
                 }
+            
+            return {
+                "success": True,
+                "message": "Item added to cart",
+                "item_id": cart_item.id,
+                "quantity": cart_item.quantity,
+                "action": "added"
+            }
                 
         except ValueError as e:
             self.db.rollback()
@@ -144,20 +145,41 @@ class ShoppingCartService:
             self.db.rollback()
             raise
     
+    @staticmethod
+    def _owned_by(user_id: int):
+        """Filter restricting cart items to the user's cart"""
+        return ShoppingCartItemModel.cart_id.in_(
+            select(ShoppingCartModel.id).where(ShoppingCartModel.user_id == user_id)
+        )
+    
+    def _get_cart_item_row(self, user_id: int, item_id: int):
+        """Load one of the user's cart items with the product fields mutations need, as one row"""
+        return self.db.query(
+            ShoppingCartItemModel.id,
+            ShoppingCartItemModel.quantity,
+            ProductModel.name,
+            ProductModel.is_active,
+            ProductModel.stock_quantity
+        ).join(
+            ProductModel, ProductModel.id == ShoppingCartItemModel.product_id
+        ).filter(
+            ShoppingCartItemModel.id == item_id,
+            self._owned_by(user_id)
+        ).first()
+    
     def update_cart_item(self, user_id: int, item_id: int, quantity: int) -> Dict[str, Any]:
         """Update cart item quantity"""
         try:
-            # Get cart item with product and cart details
-            cart_item = self.db.query(ShoppingCartItemModel).options(
-                joinedload(ShoppingCartItemModel.cart),
-                joinedload(ShoppingCartItemModel.product)
-            ).filter(ShoppingCartItemModel.id == item_id).first()
+            # Only the columns needed for the stock check
+            cart_item = self._get_cart_item_row(user_id, item_id)
             
-            self.validator.validate_cart_item_ownership(cart_item, user_id)
-            self.validator.validate_product_availability(cart_item.product, quantity)
+            self.validator.validate_cart_item_found(cart_item)
+            self.validator.validate_product_availability(cart_item, quantity)
             
             old_quantity = cart_item.quantity
-            cart_item.quantity = quantity
+            self.db.query(ShoppingCartItemModel).filter(
+                ShoppingCartItemModel.id == item_id
+            ).update({ShoppingCartItemModel.quantity: quantity}, synchronize_session=False)
             
             self.db.commit()
             
@@ -180,15 +202,14 @@ class ShoppingCartService:
     def remove_cart_item(self, user_id: int, item_id: int) -> Dict[str, Any]:
         """Remove item from cart"""
         try:
-            cart_item = self.db.query(ShoppingCartItemModel).options(
-                joinedload(ShoppingCartItemModel.cart),
-                joinedload(ShoppingCartItemModel.product)
-            ).filter(ShoppingCartItemModel.id == item_id).first()
+            cart_item = self._get_cart_item_row(user_id, item_id)
             
-            self.validator.validate_cart_item_ownership(cart_item, user_id)
+            self.validator.validate_cart_item_found(cart_item)
             
-            product_name = cart_item.product.name
-            self.db.delete(cart_item)
+            product_name = cart_item.name
+            self.db.query(ShoppingCartItemModel).filter(
+                ShoppingCartItemModel.id == item_id
+            ).delete(synchronize_session=False)
             self.db.commit()
             
             return {
@@ -208,33 +229,28 @@ class ShoppingCartService:
     def clear_cart(self, user_id: int) -> Dict[str, Any]:
         """Clear all items from user's cart"""
         try:
-            cart = self.db.query(ShoppingCartModel).filter(
+            cart_id = self.db.query(ShoppingCartModel.id).filter(
                 ShoppingCartModel.user_id == user_id
-            ).first()
+            ).scalar()
             
-            if not cart:
+            if not cart_id:
                 return {
                     "success": True,
                     "message": "Cart is already empty",
                     "items_removed": 0
                 }
             
-            # Count items before deletion
-            items_count = self.db.query(ShoppingCartItemModel).filter(
-                ShoppingCartItemModel.cart_id == cart.id
-            ).count()
-            
-            # Delete all cart items
-            self.db.query(ShoppingCartItemModel).filter(
-                ShoppingCartItemModel.cart_id == cart.id
-            ).delete()
+            # Delete all cart items, the returned rowcount is the number removed
+            items_removed = self.db.query(ShoppingCartItemModel).filter(
+                ShoppingCartItemModel.cart_id == cart_id
+            ).delete(synchronize_session=False)
             
             self.db.commit()
             
             return {
                 "success": True,
                 "message": "Cart cleared successfully",
-                "items_removed": items_count
+                "items_removed": items_removed
             }
             
         except Exception as e:
@@ -242,12 +258,70 @@ class ShoppingCartService:
             self.db.rollback()
             raise
     
-    def get_cart_summary(self, user_id: int) -> Dict[str, Any]:
+    def get_cart_item_with_details(self, user_id: int, item_id: int) -> Optional[ShoppingCartItemModel]:
+        """Get specific cart item with full product details"""
+        try:
+            # The response only renders the product's own columns, not its category or images
+            cart_item = self.db.query(ShoppingCartItemModel).options(
+                joinedload(ShoppingCartItemModel.product)
+            ).filter(
+                ShoppingCartItemModel.id == item_id,
+                self._owned_by(user_id)
+            ).first()
+            
+            return cart_item
+            
+        except Exception as e:
+            logger.error(f"Error fetching cart item {item_id} for user {user_id}: {str(e)}")
+            raise
+
+
+class ShoppingCartReadService:
+    """Read-only cart queries on an AsyncSession, for the hot read endpoints"""
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    async def get_cart_with_items(self, user_id: int) -> Optional[ShoppingCartModel]:
+        """Get user's cart with all items and product details"""
+        try:
+            # Everything the response renders (items and their product columns) is eager loaded,
+            # lazy loads can't run on AsyncSession; category and images aren't rendered
+            result = await self.db.execute(
+                select(ShoppingCartModel).options(
+                    selectinload(ShoppingCartModel.cart_items).joinedload(ShoppingCartItemModel.product)
+                ).where(ShoppingCartModel.user_id == user_id)
+            )
+            
+            return result.scalars().first()
+            
+        except Exception as e:
+            logger.error(f"Error fetching cart for user {user_id}: {str(e)}")
+            raise
+    
+    async def get_cart_summary(self, user_id: int) -> Dict[str, Any]:
         """Get cart summary with totals"""
         try:
-            cart = self.get_cart_with_items(user_id)
+            # Totals in one aggregate round trip, no cart/item/product objects loaded
+            result = await self.db.execute(
+                select(
+                    func.coalesce(func.sum(ShoppingCartItemModel.quantity), 0).label("total_items"),
+                    func.coalesce(
+                        func.sum(ShoppingCartItemModel.quantity * ProductModel.price), 0
+                    ).label("total_price"),
+                    func.count(ShoppingCartItemModel.id).label("items_count"),
+                    ShoppingCartModel.id.label("cart_id")
+                ).select_from(ShoppingCartModel).outerjoin(
+                    ShoppingCartItemModel, ShoppingCartItemModel.cart_id == ShoppingCartModel.id
+                ).outerjoin(
+                    ProductModel, ProductModel.id == ShoppingCartItemModel.product_id
+                ).where(
+                    ShoppingCartModel.user_id == user_id
+                ).group_by(ShoppingCartModel.id)
+            )
+            summary = result.first()
             
-            if not cart or not cart.cart_items:
+            if not summary or not summary.items_count:
                 return {
                     "total_items": 0,
                     "total_price": 0.0,
@@ -255,37 +329,13 @@ class ShoppingCartService:
                     "cart_id": None
                 }
             
-            total_items = sum(item.quantity for item in cart.cart_items)
-            total_price = sum(item.quantity * item.product.price for item in cart.cart_items)
-            items_count = len(cart.cart_items)
-            
             return {
-                "total_items": total_items,
-                "total_price": float(total_price),
-                "items_count": items_count,
-                "cart_id": cart.id
+                "total_items": int(summary.total_items),
+                "total_price": float(summary.total_price),
+                "items_count": summary.items_count,
+                "cart_id": summary.cart_id
             }
             
         except Exception as e:
             logger.error(f"Error getting cart summary for user {user_id}: {str(e)}")
             raise
-    
-    def get_cart_item_with_details(self, user_id: int, item_id: int) -> Optional[ShoppingCartItemModel]:
-        """Get specific cart item with full product details"""
-        try:
-            cart_item = self.db.query(ShoppingCartItemModel).options(
-                joinedload(ShoppingCartItemModel.cart),
-                joinedload(ShoppingCartItemModel.product).options(
-                    joinedload(ProductModel.category),
-                    selectinload(ProductModel.images)
-                )
-            ).filter(
-                ShoppingCartItemModel.id == item_id,
-                ShoppingCartItemModel.cart.has(ShoppingCartModel.user_id == user_id)
-            ).first()
-            
-            return cart_item
-            
-        except Exception as e:
-            logger.error(f"Error fetching cart item {item_id} for user {user_id}: {str(e)}")
-            raise 
\ No newline at end of file
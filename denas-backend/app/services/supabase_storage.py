@@ -1,8 +1,11 @@
 import os
-import uuid
-from typing import Optional, List
+import re
+import hashlib
+import asyncio
+from typing import Optional, List, Tuple
+from functools import lru_cache
 from fastapi import HTTPException, UploadFile
-from supabase import create_client, Client
+import httpx
 import logging
 import urllib.parse
 
@@ -10,29 +13,82 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of paths sent in one storage remove request
+DELETE_BATCH_SIZE = 1000
+
+# Object path in a storage URL: .../storage/v1/object/(public|sign)/<bucket>/<path>[?query]
+_OBJECT_PATH_RE = re.compile(r'/storage/v1/object/(?:public|sign)/[^/]+/([^?#]+)')
+
+# Upload attempts for transient failures (network errors, 429/5xx responses)
+UPLOAD_ATTEMPTS = 3
+
+# Size of the chunks upload bodies are read and streamed in
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def _is_transient(error: httpx.HTTPError) -> bool:
+    """Whether a storage error is worth retrying"""
+    if isinstance(error, httpx.HTTPStatusError):
+        status_code = error.response.status_code
+        return status_code == 429 or status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+def _file_size(fileobj) -> int:
+    """Size of a (spooled) upload file, leaving it rewound; blocking once it spilled to disk"""
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    fileobj.seek(0)
+    return size
+
+
+def _sha256_digest(fileobj):
+    """SHA-256 of a file's whole content, leaving it rewound; blocking, run in a thread"""
+    fileobj.seek(0)
+    digest = hashlib.file_digest(fileobj, "sha256")
+    fileobj.seek(0)
+    return digest
+
+
+async def _stream_upload(file: UploadFile):
+    """Yield an uploaded file's content from the start, chunk by chunk"""
+    await file.seek(0)
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        yield chunk
+
+
 class SupabaseStorageService:
     """Service for handling file uploads to Supabase Storage"""
     
     def __init__(self):
-        logger.info(f"Initializing Supabase Storage Service")
-        logger.info(f"SUPABASE_URL: {settings.SUPABASE_URL}")
-        logger.info(f"SUPABASE_SERVICE_ROLE_KEY: {'***' if settings.SUPABASE_SERVICE_ROLE_KEY else 'None'}")
-        logger.info(f"SUPABASE_STORAGE_BUCKET: {settings.SUPABASE_STORAGE_BUCKET}")
-        logger.info(f"has_supabase_storage: {settings.has_supabase_storage}")
-        
         if not settings.has_supabase_storage:
             raise ValueError("Supabase storage is not properly configured")
         
         try:
-            self.supabase: Client = create_client(
-                settings.SUPABASE_URL, 
-                settings.SUPABASE_SERVICE_ROLE_KEY
+            # Storage REST API called directly over one persistent HTTP/2 client, so
+            # connections and TLS sessions are reused by every request
+            self._http = httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=100, max_connections=200),
+                timeout=30,
+                headers={
+                    "apikey": settings.SUPABASE_SERVICE_ROLE_KEY,
+                    "Authorization": f"Bearer {settings.SUPABASE_SERVICE_ROLE_KEY}"
+                }
             )
             self.bucket_name = settings.SUPABASE_STORAGE_BUCKET
-            logger.info(f"Supabase client created successfully")
+            # Bucket object endpoint, built once instead of on every storage call
+            self._bucket_url = f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/{self.bucket_name}"
+            # Prefix of every public URL in the bucket, for building and parsing file URLs
+            self._public_prefix = f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{self.bucket_name}/"
+            logger.info("Supabase storage client created for bucket %s", self.bucket_name)
         except Exception as e:
             logger.error(f"Failed to create Supabase client: {str(e)}")
             raise
+    
+    async def close(self) -> None:
+        """Close the HTTP client and its pooled connections"""
+        await self._http.aclose()
         
     async def upload_file(
         self, 
@@ -55,72 +111,8 @@ class SupabaseStorageService:
             HTTPException: If upload fails
         """
         try:
-            # Validate file size
-            if file.size and file.size > max_size_mb * 1024 * 1024:
-                raise HTTPException(
-                    status_code=413,
-                    detail=f"File too large. Maximum size is {max_size_mb}MB"
-                )
-            
-            # Generate unique filename
-            file_extension = file.filename.split('.')[-1] if file.filename and '.' in file.filename else ''
-            unique_filename = f"{uuid.uuid4()}.{file_extension}" if file_extension else str(uuid.uuid4())
-            # Don't add folder prefix if it's already the bucket name
-            if folder == self.bucket_name:
-                file_path = unique_filename
-            else:
-                file_path = f"{folder}/{unique_filename}"
-            
-            # Read file content
-            file_content = await file.read()
-            
-            # Reset file position for potential re-reading
-            try:
-                await file.seek(0)
-            except:
-                # If seek fails, it's okay, we already have the content
-                pass
-            
-            try:
-                # Upload to Supabase Storage
-                result = self.supabase.storage.from_(self.bucket_name).upload(
-                    file_path,
-                    file_content,
-                    file_options={
-                        "content-type": file.content_type or "application/octet-stream",
-                        "upsert": "false"
-                    }
-                )
-                
-                logger.info(f"Upload result: {result}")
-                
-                # Get public URL
-                public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
-                
-                logger.info(f"File uploaded successfully: {file_path} -> {public_url}")
-                return public_url
-                
-            except Exception as upload_error:
-                logger.error(f"Supabase upload error: {str(upload_error)}")
-                # Try with different approach
-                try:
-                    # Alternative upload method
-                    result = self.supabase.storage.from_(self.bucket_name).upload(
-                        path=file_path,
-                        file=file_content,
-                        file_options={"content-type": file.content_type or "application/octet-stream"}
-                    )
-                    
-                    public_url = self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
-                    logger.info(f"File uploaded successfully (alternative method): {file_path} -> {public_url}")
-                    return public_url
-                    
-                except Exception as alt_error:
-                    logger.error(f"Alternative upload also failed: {str(alt_error)}")
-                    raise HTTPException(
-                        status_code=500,
-                        detail=f"Failed to upload file to storage: {str(alt_error)}"
-                    )
+            file_path, file_size = await self._prepare_upload(file, folder, max_size_mb)
+            return await self._send_upload(file, file_path, file_size)
             
         except HTTPException:
             raise
@@ -131,30 +123,164 @@ class SupabaseStorageService:
                 detail=f"Failed to upload file: {str(e)}"
             )
     
+    async def _prepare_upload(
+        self,
+        file: UploadFile,
+        folder: str,
+        max_size_mb: int
+    ) -> Tuple[str, int]:
+        """
+        Validate an upload's size and pick its storage path
+        
+        The file name is the SHA-256 of the content, so a stored object never changes
+        and re-uploads of the same file land on the same object
+        
+        Returns:
+            (file_path, file_size)
+            
+        Raises:
+            HTTPException: If the file is too large
+        """
+        # Size from the spooled file itself, so an oversized upload is rejected
+        # without reading its content (UploadFile.size isn't always set)
+        max_bytes = max_size_mb * 1024 * 1024
+        file_size = file.size
+        if file_size is None:
+            file_size = await asyncio.to_thread(_file_size, file.file)
+        
+        if file_size > max_bytes:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {max_size_mb}MB"
+            )
+        
+        # Single pass over the content into a reused buffer, in a worker thread
+        # (with the rewinds) so disk I/O and hashing don't hold up the event loop
+        content_hash = await asyncio.to_thread(_sha256_digest, file.file)
+        
+        # Content addressed filename
+        _, dot, file_extension = (file.filename or '').rpartition('.')
+        digest = content_hash.hexdigest()
+        unique_filename = f"{digest}.{file_extension}" if dot and file_extension else digest
+        # Don't add folder prefix if it's already the bucket name
+        if folder == self.bucket_name:
+            file_path = unique_filename
+        else:
+            file_path = f"{folder}/{unique_filename}"
+        
+        return file_path, file_size
+    
+    async def _send_upload(self, file: UploadFile, file_path: str, file_size: int) -> str:
+        """
+        Stream a validated upload to storage
+        
+        Returns:
+            Public URL of the uploaded file
+            
+        Raises:
+            HTTPException: If the upload fails
+        """
+        # Upload to Supabase Storage, streaming the body from the spooled upload file
+        # and retrying transient failures with exponential backoff
+        for attempt in range(UPLOAD_ATTEMPTS):
+            try:
+                response = await self._http.post(
+                    f"{self._bucket_url}/{urllib.parse.quote(file_path)}",
+                    content=_stream_upload(file),
+                    headers={
+                        "Content-Type": file.content_type or "application/octet-stream",
+                        "Content-Length": str(file_size),
+                        # Content addressed objects never change: cache them forever and
+                        # let an identical re-upload overwrite the object with itself
+                        "Cache-Control": "public, max-age=31536000, immutable",
+                        "x-upsert": "true"
+                    }
+                )
+                response.raise_for_status()
+                break
+            except httpx.HTTPError as upload_error:
+                if attempt == UPLOAD_ATTEMPTS - 1 or not _is_transient(upload_error):
+                    logger.error(f"Supabase upload error: {str(upload_error)}")
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Failed to upload file to storage: {str(upload_error)}"
+                    )
+                logger.warning(
+                    "Transient upload error for %s (attempt %d), retrying: %s",
+                    file_path, attempt + 1, upload_error
+                )
+                await asyncio.sleep(2 ** attempt)
+        
+        logger.debug("Upload result: %s", response.text)
+        
+        # Get public URL
+        public_url = self.get_file_url(file_path)
+        
+        logger.debug("File uploaded: %s -> %s", file_path, public_url)
+        return public_url
+    
     async def upload_multiple_files(
         self, 
         files: List[UploadFile], 
         folder: str = "uploads",
-        max_size_mb: int = 5
+        max_size_mb: int = 5,
+        concurrency: int = 8
     ) -> List[str]:
         """
-        Upload multiple files to Supabase Storage
+        Upload multiple files to Supabase Storage concurrently
+        
+        A producer validates the files one by one and queues them while up to
+        `concurrency` workers upload queued files, so validation and uploads overlap
         
         Args:
             files: List of uploaded files
             folder: Folder within the bucket
             max_size_mb: Maximum file size in MB per file
+            concurrency: Maximum number of uploads in flight at once
             
         Returns:
-            List of public URLs of uploaded files
+            List of public URLs of uploaded files, in the same order as files
         """
-        urls = []
-        for file in files:
-            url = await self.upload_file(file, folder, max_size_mb)
-            urls.append(url)
+        if not files:
+            return []
+        
+        workers = max(1, min(concurrency, len(files)))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        urls: List[Optional[str]] = [None] * len(files)
+        
+        async def produce() -> None:
+            for index, file in enumerate(files):
+                file_path, file_size = await self._prepare_upload(file, folder, max_size_mb)
+                await queue.put((index, file, file_path, file_size))
+            # One stop marker per worker
+            for _ in range(workers):
+                await queue.put(None)
+        
+        async def consume() -> None:
+            while (item := await queue.get()) is not None:
+                index, file, file_path, file_size = item
+                urls[index] = await self._send_upload(file, file_path, file_size)
+        
+        tasks = [asyncio.create_task(produce())]
+        tasks += [asyncio.create_task(consume()) for _ in range(workers)]
+        try:
+            await asyncio.gather(*tasks)
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Upload error: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload file: {str(e)}"
+            )
+        finally:
+            # On failure, don't leave the producer or other workers blocked on the queue
+            for task in tasks:
+                task.cancel()
+        
         return urls
     
-    def delete_file(self, file_path: str) -> bool:
+    async def delete_file(self, file_path: str) -> bool:
         """
         Delete a file from Supabase Storage
         
@@ -165,14 +291,19 @@ class SupabaseStorageService:
             True if successful, False otherwise
         """
         try:
-            result = self.supabase.storage.from_(self.bucket_name).remove([file_path])
-            logger.info(f"File deleted from storage: {file_path}")
-            return True
-        except Exception as e:
-            logger.error(f"Delete error for {file_path}: {str(e)}")
+            deleted = await self._remove([file_path])
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Delete failed for %s: %s", file_path, e)
+            return False
+        
+        if not deleted:
+            logger.warning("Delete failed for %s: file not found in storage", file_path)
             return False
+        
+        logger.debug("File deleted from storage: %s", file_path)
+        return True
     
-    def delete_files(self, file_paths: List[str]) -> dict:
+    async def delete_files(self, file_paths: List[str]) -> dict:
         """
         Delete multiple files from Supabase Storage
         
@@ -184,19 +315,41 @@ class SupabaseStorageService:
         """
         if not file_paths:
             return {"deleted": 0, "failed": 0}
-            
+        
+        # One bulk remove per batch, all batches in flight at once
+        batches = [
+            file_paths[i:i + DELETE_BATCH_SIZE]
+            for i in range(0, len(file_paths), DELETE_BATCH_SIZE)
+        ]
+        deleted_counts = await asyncio.gather(*(self._delete_batch(batch) for batch in batches))
+        
+        deleted_count = sum(deleted_counts)
+        return {"deleted": deleted_count, "failed": len(file_paths) - deleted_count}
+    
+    async def _remove(self, file_paths: List[str]) -> int:
+        """
+        Remove files with one storage API request
+        Returns the number of objects actually removed (missing paths aren't counted)
+        """
+        response = await self._http.request(
+            "DELETE",
+            self._bucket_url,
+            json={"prefixes": file_paths}
+        )
+        response.raise_for_status()
+        # The API lists the objects it removed
+        return len(response.json())
+    
+    async def _delete_batch(self, file_paths: List[str]) -> int:
+        """Remove one batch of files with a single bulk request, returns the number deleted"""
         try:
-            result = self.supabase.storage.from_(self.bucket_name).remove(file_paths)
-            logger.info(f"Bulk delete attempted for {len(file_paths)} files")
-            return {"deleted": len(file_paths), "failed": 0}
-        except Exception as e:
-            logger.error(f"Bulk delete error: {str(e)}")
-            # Try individual deletions as fallback
-            deleted_count = 0
-            for file_path in file_paths:
-                if self.delete_file(file_path):
-                    deleted_count += 1
-            return {"deleted": deleted_count, "failed": len(file_paths) - deleted_count}
+            deleted = await self._remove(file_paths)
+        except (httpx.HTTPError, ValueError) as e:
+            logger.warning("Bulk delete failed for %d files: %s", len(file_paths), e)
+            return 0
+        
+        logger.debug("Bulk delete removed %d of %d files", deleted, len(file_paths))
+        return deleted
     
     def extract_file_path_from_url(self, url: str) -> str:
         """
@@ -206,37 +359,18 @@ class SupabaseStorageService:
             url: Full Supabase storage URL
             
         Returns:
-            File path for storage operations
+            File path for storage operations (decoded, as the storage API expects it)
         """
-        try:
-            # Supabase URLs format: https://[project].supabase.co/storage/v1/object/public/[bucket]/[path]
-            # We need to extract everything after the bucket name
-            import urllib.parse
-            parsed_url = urllib.parse.urlparse(url)
-            
-            # Split path and find bucket segment
-            path_parts = parsed_url.path.split('/')
-            
-            # Find bucket name in path
-            if self.bucket_name in path_parts:
-                bucket_index = path_parts.index(self.bucket_name)
-                # Everything after bucket name is the file path
-                file_path = '/'.join(path_parts[bucket_index + 1:])
-                return file_path
-            else:
-                # Fallback: assume everything after 'public/' is the file path
-                if 'public' in path_parts:
-                    public_index = path_parts.index('public')
-                    file_path = '/'.join(path_parts[public_index + 1:])
-                    return file_path
-                else:
-                    # Last resort: use filename from URL
-                    return path_parts[-1]
-                    
-        except Exception as e:
-            logger.error(f"Failed to extract file path from URL {url}: {str(e)}")
-            # Return the original URL as fallback (might not work for deletion)
-            return url.split('/')[-1]
+        # Our own public URLs: one prefix check and a slice. get_file_url quotes the
+        # path, so every branch unquotes it again.
+        if url.startswith(self._public_prefix):
+            return urllib.parse.unquote(url[len(self._public_prefix):].split('?', 1)[0])
+        
+        match = _OBJECT_PATH_RE.search(url)
+        if match:
+            return urllib.parse.unquote(match.group(1))
+        # Not a storage object URL: fall back to the last path segment
+        return urllib.parse.unquote(url.rsplit('/', 1)[-1])
     
     def extract_file_paths_from_urls(self, urls: List[str]) -> List[str]:
         """
@@ -254,26 +388,22 @@ class SupabaseStorageService:
         """
         Get public URL for a file
         
+        The bucket is public, so the URL is built directly instead of going through the client
+        
         Args:
             file_path: Path to the file in storage
             
         Returns:
             Public URL of the file
         """
-        return self.supabase.storage.from_(self.bucket_name).get_public_url(file_path)
-
-# Global instance
-supabase_storage = None
+        return self._public_prefix + urllib.parse.quote(file_path)
 
+@lru_cache(maxsize=1)
 def get_supabase_storage() -> SupabaseStorageService:
-    """Get Supabase storage service instance"""
-    global supabase_storage
-    if supabase_storage is None:
-        if settings.has_supabase_storage:
-            supabase_storage = SupabaseStorageService()
-        else:
-            raise HTTPException(
-                status_code=500,
-                detail="Supabase storage is not configured"
-            )
-    return supabase_storage 
\ No newline at end of file
+    """Get the shared Supabase storage service instance (created on first use)"""
+    if not settings.has_supabase_storage:
+        raise HTTPException(
+            status_code=500,
+            detail="Supabase storage is not configured"
+        )
+    return SupabaseStorageService()
@@ -1,33 +1,100 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, make_transient_to_detached
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from app.models.user import User, UserRole
+from app.models.favorite import Favorite
 import logging
 from typing import Optional, List
+from sqlalchemy.engine import Row
 import datetime
-from sqlalchemy import func, and_
+import threading
+import re
+from sqlalchemy import select, insert, bindparam, func, and_, or_, update, delete
+from cachetools import TTLCache
 
 logger = logging.getLogger(__name__)
 
+# Admin dashboard stats change slowly but are polled often. Cleared on user
+# create/role change/delete; the TTL bounds staleness across workers.
+# UserService runs in FastAPI's threadpool and TTLCache is not thread-safe, so
+# every access goes through the lock.
+_user_stats_cache = TTLCache(maxsize=1, ttl=30)
+_user_stats_lock = threading.Lock()
+
+
+def _clear_user_stats() -> None:
+    with _user_stats_lock:
+        _user_stats_cache.clear()
+
+# get_current_user resolves the Firebase UID on every authenticated request. Keep a
+# detached snapshot of the user's columns per uid and merge it into the request's
+# session without a SELECT. Evicted on profile/role changes and deletes; the TTL
+# bounds staleness across workers. Guarded by a lock like the stats cache.
+_user_by_uid_cache = TTLCache(maxsize=1024, ttl=30)
+_user_by_uid_lock = threading.Lock()
+
+
+def _user_snapshot(user: User) -> User:
+    """Detached copy of a user's column state, safe to share between sessions"""
+    snapshot = User(
+        id=user.id,
+        uid=user.uid,
+        phone=user.phone,
+        role=user.role,
+        created_at=user.created_at
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+# Hot single-column lookups, built once and reused with bound parameters
+_BY_UID = select(User).where(User.uid == bindparam("uid"))
+_BY_PHONE = select(User).where(User.phone == bindparam("phone"))
+
+# Columns the admin listings render (the User response schema); selected as plain
+# rows so listings skip ORM hydration and identity-map bookkeeping
+_LISTING_COLUMNS = (User.id, User.uid, User.phone, User.role, User.created_at)
+
+# Phones are stored in E.164 form ("+998..."), so only terms written that way
+# ('+' then digits) are searched as phone prefixes; bare digits may be a local
+# part or part of a UID and go through the substring search
+_PHONE_PREFIX_RE = re.compile(r'^\+\d+$')
+
 class UserService:
     """Service for handling user management operations"""
     
     @staticmethod
-    async def get_user_by_uid(db: Session, uid: str) -> Optional[User]:
+    def get_user_by_uid(db: Session, uid: str) -> Optional[User]:
         """Get user by Firebase UID"""
-        return db.query(User).filter(User.uid == uid).first()
+        with _user_by_uid_lock:
+            snapshot = _user_by_uid_cache.get(uid)
+        if snapshot is not None:
+            # load=False attaches a copy of the snapshot to this session without querying
+            return db.merge(snapshot, load=False)
+        
+        user = db.scalar(_BY_UID, {"uid": uid})
+        if user:
+            with _user_by_uid_lock:
+                _user_by_uid_cache[uid] = _user_snapshot(user)
+        return user
+    
+    @staticmethod
+    def forget_cached_user(uid: str) -> None:
+        """Drop the cached snapshot for a uid (call after changing or deleting the user)"""
+        with _user_by_uid_lock:
+            _user_by_uid_cache.pop(uid, None)
     
     @staticmethod
-    async def get_user_by_phone(db: Session, phone: str) -> Optional[User]:
+    def get_user_by_phone(db: Session, phone: str) -> Optional[User]:
         """Get user by phone number"""
-        return db.query(User).filter(User.phone == phone).first()
+        return db.scalar(_BY_PHONE, {"phone": phone})
     
     @staticmethod
-    async def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+    def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
         """Get user by ID"""
-        return db.query(User).filter(User.id == user_id).first()
+        return db.get(User, user_id)
     
     @staticmethod
-    async def create_user(
+    def create_user(
         db: Session, 
         uid: str, 
         phone: str,
@@ -39,15 +106,17 @@ class UserService:
         Raises: IntegrityError if user already exists
         """
         try:
-            user = User(
-                uid=uid,
-                phone=phone,
-                role=role
-            )
+            # INSERT ... RETURNING hydrates id/created_at in the same round trip (no refresh)
+            user = db.execute(
+                insert(User)
+                .values(uid=uid, phone=phone, role=role)
+                .returning(User)
+            ).scalar_one()
             
-            db.add(user)
+            # Keep the returned state; committing would otherwise expire it
+            db.expunge(user)
             db.commit()
-            db.refresh(user)
+            _clear_user_stats()
             
             logger.info(f"User created successfully: {user.id} with UID: {uid}")
             return user
@@ -62,7 +131,39 @@ class UserService:
             raise e
     
     @staticmethod
-    async def get_or_create_user(
+    def create_users_bulk(db: Session, users: List[dict]) -> List[User]:
+        """
+        Create many users at once (seeding / imports)
+        Each dict holds uid, phone and optionally role
+        Returns: created users
+        Raises: IntegrityError if any user already exists
+        """
+        if not users:
+            return []
+        
+        try:
+            # One executemany; SQLAlchemy batches the rows into multi-row INSERT ... RETURNING
+            created = db.scalars(insert(User).returning(User), users).all()
+            
+            for user in created:
+                db.expunge(user)
+            db.commit()
+            _clear_user_stats()
+            
+            logger.info(f"Bulk created {len(created)} users")
+            return list(created)
+            
+        except IntegrityError as e:
+            db.rollback()
+            logger.error(f"Database integrity error bulk creating users: {str(e)}")
+            raise e
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk creating users: {str(e)}")
+            raise e
+    
+    @staticmethod
+    def get_or_create_user(
         db: Session,
         uid: str,
         phone: str
@@ -72,24 +173,33 @@ class UserService:
         Returns: user (existing or newly created)
         """
         try:
-            # Try to find existing user
-            user = await UserService.get_user_by_uid(db, uid)
+            # Atomic insert; a concurrent or earlier registration of the uid makes it a no-op
+            user = db.execute(
+                pg_insert(User)
+                .values(uid=uid, phone=phone, role=UserRole.USER)
+                .on_conflict_do_nothing(index_elements=['uid'])
+                .returning(User)
+            ).scalar_one_or_none()
             
             if user:
-                logger.info(f"Existing user found: {user.id} with UID: {uid}")
-                return user
-            else:
-                # User doesn't exist - create new user
-                user = await UserService.create_user(db, uid, phone)
+                db.expunge(user)
+                db.commit()
+                _clear_user_stats()
                 logger.info(f"New user created: {user.id} with UID: {uid}")
                 return user
+            
+            # Conflict on uid - the user already exists
+            user = UserService.get_user_by_uid(db, uid)
+            logger.info(f"Existing user found: {user.id} with UID: {uid}")
+            return user
                     
         except Exception as e:
+            db.rollback()
             logger.error(f"Error in get_or_create_user: {str(e)}")
             raise e
     
     @staticmethod
-    async def update_user_role(
+    def update_user_role(
         db: Session, 
         user_id: int, 
         new_role: UserRole
@@ -100,17 +210,23 @@ class UserService:
         Raises: ValueError if user not found
         """
         try:
-            user = await UserService.get_user_by_id(db, user_id)
+            # Single UPDATE ... RETURNING: no lookup first, and no refresh afterwards
+            user = db.execute(
+                update(User)
+                .where(User.id == user_id)
+                .values(role=new_role)
+                .returning(User)
+            ).scalar_one_or_none()
             if not user:
                 raise ValueError("User not found")
             
-            old_role = user.role
-            user.role = new_role
-            
+            # Keep the returned state; committing would otherwise expire it
+            db.expunge(user)
             db.commit()
-            db.refresh(user)
+            _clear_user_stats()
+            UserService.forget_cached_user(user.uid)
             
-            logger.info(f"User {user_id} role changed from {old_role} to {new_role}")
+            logger.info(f"User {user_id} role changed to {new_role}")
             return user
             
         except Exception as e:
@@ -119,18 +235,23 @@ class UserService:
             raise e
 
     @staticmethod
-    async def delete_user(db: Session, user_id: int) -> None:
+    def delete_user(db: Session, user_id: int) -> None:
         """
         Delete user
         Raises: ValueError if user not found
         """
         try:
-            user = await UserService.get_user_by_id(db, user_id)
-            if not user:
+            # Bulk deletes skip the ORM cascade, so clear favorites explicitly
+            db.execute(delete(Favorite).where(Favorite.user_id == user_id))
+            uid = db.execute(
+                delete(User).where(User.id == user_id).returning(User.uid)
+            ).scalar_one_or_none()
+            if uid is None:
                 raise ValueError("User not found")
             
-            db.delete(user)
             db.commit()
+            _clear_user_stats()
+            UserService.forget_cached_user(uid)
             
             logger.info(f"User {user_id} deleted successfully")
             
@@ -140,28 +261,47 @@ class UserService:
             raise e
 
     @staticmethod
-    async def get_all_users(
+    def get_all_users(
         db: Session, 
         limit: Optional[int] = 100, 
         offset: Optional[int] = 0,
-        role_filter: Optional[UserRole] = None
-    ) -> tuple[List[User], int]:
+        role_filter: Optional[UserRole] = None,
+        after_id: Optional[int] = None
+    ) -> tuple[List[Row], Optional[int]]:
         """
         Get all users with pagination and filtering
-        Returns: (users_list, total_count)
+        Pass the last returned id as after_id to page by key instead of offset;
+        keyset pages skip the total (returned as None)
+        Returns: (user rows, total_count)
         """
         try:
-            query = db.query(User)
+            if after_id is not None:
+                # Keyset page: index range scan on the primary key, cost independent of depth
+                stmt = select(*_LISTING_COLUMNS).where(User.id > after_id)
+                if role_filter:
+                    stmt = stmt.where(User.role == role_filter)
+                return db.execute(stmt.order_by(User.id).limit(limit)).all(), None
+            
+            # Total comes back as a window over the filtered rows, in the same query as the page
+            stmt = select(*_LISTING_COLUMNS, func.count().over().label("total"))
             
             # Apply role filter if provided
             if role_filter:
-                query = query.filter(User.role == role_filter)
+                stmt = stmt.where(User.role == role_filter)
             
-            # Get total count before pagination
-            total_count = query.count()
+            # Apply pagination; order by id so pages are stable
+            rows = db.execute(stmt.order_by(User.id).offset(offset).limit(limit)).all()
             
-            # Apply pagination
-            users = query.offset(offset).limit(limit).all()
+            users = rows
+            if rows:
+                total_count = rows[0].total
+            elif offset:
+                # Page past the end: no row to carry the window total
+                total_count = db.scalar(
+                    stmt.with_only_columns(func.count(User.id))
+                )
+            else:
+                total_count = 0
             
             return users, total_count
             
@@ -170,32 +310,44 @@ class UserService:
             raise e
 
     @staticmethod
-    async def get_user_stats(db: Session) -> dict:
+    def get_user_stats(db: Session) -> dict:
         """
         Get user statistics for the admin dashboard.
         """
+        with _user_stats_lock:
+            cached = _user_stats_cache.get("stats")
+        if cached is not None:
+            return dict(cached)
+        
         try:
-            total_users = db.query(User).count()
-            total_admins = db.query(User).filter(User.role.in_([UserRole.ADMIN, UserRole.MANAGER])).count()
-            regular_users = db.query(User).filter(User.role == UserRole.USER).count()
-
-            # New users this month
-            current_month = datetime.datetime.utcnow().month
-            current_year = datetime.datetime.utcnow().year
-            new_users_this_month = db.query(User).filter(
-                and_(
-                    func.extract('month', User.created_at) == current_month,
-                    func.extract('year', User.created_at) == current_year
+            # Current calendar month as a half-open range, so created_at stays index-seekable
+            month_start = datetime.datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+            next_month_start = (month_start + datetime.timedelta(days=32)).replace(day=1)
+            
+            # All counters in one aggregate pass over users (COUNT(*) FILTER (WHERE ...))
+            total_users, regular_users, total_admins, new_users_this_month = db.execute(select(
+                func.count(),
+                func.count().filter(User.role == UserRole.USER),
+                func.count().filter(User.role.in_([UserRole.ADMIN, UserRole.MANAGER])),
+                func.count().filter(
+                    and_(
+                        User.created_at >= month_start,
+                        User.created_at < next_month_start
+                    )
                 )
-            ).count()
+            ).select_from(User)).one()
             
-            return {
+            stats = {
                 "total_users": total_users,
                 "regular_users": regular_users,
                 "total_admins": total_admins,
                 "new_users_this_month": new_users_this_month,
                 "active_users": total_users  # Placeholder - could be enhanced with actual activity tracking
             }
+            # Only real results are cached; the zeroed fallback below is not
+            with _user_stats_lock:
+                _user_stats_cache["stats"] = stats
+            return dict(stats)
         except Exception as e:
             logger.error(f"Error getting user stats: {str(e)}")
             return {
@@ -204,21 +356,31 @@ class UserService:
             }
 
     @staticmethod
-    async def search_users(
+    def search_users(
         db: Session,
         search_term: str,
         limit: Optional[int] = 50
-    ) -> List[User]:
+    ) -> List[Row]:
         """
         Search users by phone or UID
         """
         try:
-            search_pattern = f"%{search_term}%"
+            if _PHONE_PREFIX_RE.match(search_term):
+                # Prefix match: a btree range scan on ix_users_phone_pattern
+                condition = User.phone.like(f"{search_term}%")
+            else:
+                # Substring match on phone or UID, served by the trigram indexes.
+                # LIKE wildcards in the term are escaped so they match literally.
+                safe_term = search_term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                search_pattern = f"%{safe_term}%"
+                condition = or_(
+                    User.phone.ilike(search_pattern, escape='\\'),
+                    User.uid.ilike(search_pattern, escape='\\')
+                )
             
-            users = db.query(User).filter(
-                (User.phone.ilike(search_pattern)) |
-                (User.uid.ilike(search_pattern))
-            ).limit(limit).all()
+            users = db.execute(
+                select(*_LISTING_COLUMNS).where(condition).limit(limit)
+            ).all()
             
             return users
             